@@ -0,0 +1,81 @@
+"""Benchmark of notification email delivery against a local SMTP server"""
+
+import time
+
+from django.core.mail import get_connection
+
+from kittyalert.benchmarks.smtp_server import FakeSMTPServer
+from kittyalert.email import (
+    build_email_message,
+    send_email_batch,
+    send_email_notification,
+)
+
+
+def run_email_benchmark(
+    email_count: int = 200,
+    connect_latency_ms: float = 0,
+    command_latency_ms: float = 0,
+    batch_size: int | None = None,
+) -> dict:
+    """Send emails to a fake SMTP server and measure throughput.
+
+    Args:
+        email_count: Number of emails to send
+        connect_latency_ms: Delay the server adds before greeting a connection
+        command_latency_ms: Delay the server adds to every command
+        batch_size: Emails sent per connection with send_email_batch, or None
+            to send each with send_email_notification over its own connection
+
+    Returns:
+        Dictionary with the emails sent and failed, SMTP connections opened,
+        emails per second and total seconds
+    """
+    with FakeSMTPServer(connect_latency_ms, command_latency_ms) as server:
+
+        def smtp_connection():
+            return get_connection(
+                "django.core.mail.backends.smtp.EmailBackend",
+                host=server.host,
+                port=server.port,
+                username="",
+                password="",
+                use_tls=False,
+                use_ssl=False,
+            )
+
+        recipients = [f"adopter{index}@example.com" for index in range(email_count)]
+        subject = "🐱 New kitties available for adoption at Benchmark Shelter!"
+        message = "There are new kitties at Benchmark Shelter since yesterday!\n"
+
+        started = time.perf_counter()
+        if batch_size is None:
+            failed = [
+                recipient
+                for recipient in recipients
+                if not send_email_notification(
+                    recipient, subject, message, connection=smtp_connection()
+                )
+            ]
+        else:
+            failed = []
+            for start in range(0, email_count, batch_size):
+                batch = recipients[start : start + batch_size]
+                errors = send_email_batch(
+                    [
+                        build_email_message(recipient, subject, message)
+                        for recipient in batch
+                    ],
+                    connection=smtp_connection(),
+                )
+                failed += [error for error in errors if error]
+        seconds = time.perf_counter() - started
+
+        return {
+            "mode": "per email" if batch_size is None else f"batch {batch_size}",
+            "emails": email_count - len(failed),
+            "failed": len(failed),
+            "connections": server.connections,
+            "seconds": round(seconds, 3),
+            "emails_per_second": round(email_count / seconds, 2),
+        }
@@ -0,0 +1,127 @@
+"""Micro-benchmark of DOM extraction against saved shelter pages
+
+Compares the single `page.evaluate` extraction in kittyalert.extraction with
+the previous approach of one protocol call per element and attribute.
+"""
+
+import statistics
+import time
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+from kittyalert.extraction import (
+    DESCRIPTION_SELECTOR,
+    FACTS_SELECTOR,
+    IMAGE_SELECTOR,
+    extract_detail,
+    extract_listing,
+)
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+class RoundTripCounter:
+    """Counts the awaited protocol calls made by the per-element extraction"""
+
+    def __init__(self):
+        self.count = 0
+
+    async def __call__(self, awaitable):
+        self.count += 1
+        return await awaitable
+
+
+async def legacy_extract_listing(page, round_trip) -> list[dict[str, str]]:
+    cards = []
+    for card in await round_trip(page.query_selector_all(".adoption__item")):
+        name_element = await round_trip(card.query_selector(".adoption__item--name a"))
+        location_element = await round_trip(card.query_selector("div:nth-child(3)"))
+        cards.append(
+            {
+                "name": (await round_trip(name_element.inner_text())).strip(),
+                "link": await round_trip(name_element.get_attribute("href")),
+                "location": (await round_trip(location_element.inner_text())).strip()
+                if location_element
+                else "N/A",
+            }
+        )
+    return cards
+
+
+async def legacy_extract_detail(page, round_trip) -> dict:
+    description_element = await round_trip(page.query_selector(DESCRIPTION_SELECTOR))
+    facts_element = await round_trip(page.query_selector(FACTS_SELECTOR))
+    kitty_data = {"description": await round_trip(description_element.inner_html())}
+    for index, label in enumerate(("age", "weight", "gender", "breed")):
+        facts = await round_trip(facts_element.query_selector_all("p"))
+        text = (await round_trip(facts[index].inner_text())).strip()
+        kitty_data[label] = text.split(f"{label.capitalize()}:")[-1]
+    kitty_data["image_urls"] = [
+        await round_trip(img.get_attribute("src"))
+        for img in await round_trip(page.query_selector_all(IMAGE_SELECTOR))
+    ]
+    return kitty_data
+
+
+async def _time(extract, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await extract()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _summarize(timings: list[float], round_trips: int) -> dict:
+    return {
+        "round_trips": round_trips,
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+
+async def run_extraction_benchmark(iterations: int = 50) -> dict[str, dict]:
+    """Time both extraction approaches on the listing and detail fixtures.
+
+    Args:
+        iterations: Number of timed extractions per approach and page
+
+    Returns:
+        Dictionary keyed by "<page>/<approach>" with the round trips per
+        extraction and the median and minimum time in milliseconds
+    """
+    results = {}
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        # The fixtures reference images on the live site; never fetch them.
+        await page.route("**/*", lambda route: route.abort())
+
+        for name, legacy, single in (
+            ("listing", legacy_extract_listing, extract_listing),
+            ("detail", legacy_extract_detail, extract_detail),
+        ):
+            await page.set_content((FIXTURES_DIR / f"{name}.html").read_text())
+
+            counter = RoundTripCounter()
+            legacy_result = await legacy(page, counter)
+            legacy_round_trips = counter.count
+            single_result = await single(page)
+            if legacy_result != single_result:
+                raise AssertionError(f"Extraction results differ on the {name} page")
+
+            results[f"{name}/per-element"] = _summarize(
+                await _time(
+                    lambda legacy=legacy: legacy(page, RoundTripCounter()), iterations
+                ),
+                legacy_round_trips,
+            )
+            results[f"{name}/evaluate"] = _summarize(
+                await _time(lambda single=single: single(page), iterations), 1
+            )
+
+        await browser.close()
+
+    return results
@@ -0,0 +1,186 @@
+"""A local fake shelter site for scraper benchmarks
+
+Serves SFSPCA-shaped pages generated on the fly: a listing page at / with one
+`.adoption__item` card per kitty, and a detail page per kitty with the
+`.elementor-widget-adoption-facts` facts, description and
+`.swiper-slide-image` carousel the scraper reads. Every response can be
+delayed by a fixed latency plus random jitter to imitate a remote site.
+"""
+
+import random
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NAMES = (
+    "Mochi",
+    "Biscuit",
+    "Luna",
+    "Pepper",
+    "Olive",
+    "Tofu",
+    "Milo",
+    "Nala",
+    "Ziggy",
+    "Clementine",
+    "Waffles",
+    "Juniper",
+)
+LOCATIONS = (
+    "Mission Adoption Center",
+    "Pacific Heights Campus",
+    "Foster Home",
+)
+BREEDS = ("Domestic Shorthair", "Domestic Longhair", "Siamese Mix", "Tabby")
+
+
+def kitty_name(index: int) -> str:
+    return f"{NAMES[index % len(NAMES)]} {index}"
+
+
+def render_listing(kitty_count: int) -> str:
+    cards = "\n".join(
+        f"""      <div class="adoption__item">
+        <div class="adoption__item--image"><a href="/pet/{index}/"><img src="/images/{index}-1.jpg" alt=""></a></div>
+        <div class="adoption__item--name"><a href="/pet/{index}/">{escape(kitty_name(index))}</a></div>
+        <div class="adoption__item--location">{LOCATIONS[index % len(LOCATIONS)]}</div>
+      </div>"""
+        for index in range(kitty_count)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en-US">
+<head><meta charset="UTF-8"><title>Adopt a Cat</title></head>
+<body>
+  <main class="site-main">
+    <h1>Cats for Adoption</h1>
+    <div class="adoption__items">
+{cards}
+    </div>
+  </main>
+</body>
+</html>
+"""
+
+
+def render_detail(index: int) -> str:
+    name = escape(kitty_name(index))
+    slides = "\n".join(
+        f'          <div class="swiper-slide"><img class="swiper-slide-image" src="/images/{index}-{slide}.jpg" alt="{name}"></div>'
+        for slide in range(1, 4)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en-US">
+<head><meta charset="UTF-8"><title>{name}</title></head>
+<body>
+  <main class="site-main">
+    <div class="elementor-widget elementor-widget-image-carousel">
+      <div class="elementor-widget-container">
+        <div class="swiper-wrapper">
+{slides}
+        </div>
+      </div>
+    </div>
+    <div class="elementor-widget elementor-widget-adoption-facts">
+      <div class="elementor-widget-container">
+        <p><strong>Age:</strong> {index % 15 + 1} years</p>
+        <p><strong>Weight:</strong> {index % 9 + 6} lbs</p>
+        <p><strong>Gender:</strong> {"Female" if index % 2 else "Male"}</p>
+        <p><strong>Breed:</strong> {BREEDS[index % len(BREEDS)]}</p>
+      </div>
+    </div>
+    <div class="elementor-widget elementor-widget-theme-post-content">
+      <div class="elementor-widget-container">
+        <p>{name} is a sweet, curious cat who loves chin scratches and sunny windowsills.</p>
+        <p>Kitty number {index} would do best in a calm home.</p>
+      </div>
+    </div>
+  </main>
+</body>
+</html>
+"""
+
+
+class FakeShelterSite:
+    """A fake shelter site served from a background thread.
+
+    Use it as a context manager; `url` is the listing page while it runs.
+
+    Args:
+        kitty_count: Number of kitties on the listing
+        latency_ms: Delay added to every response
+        jitter_ms: Maximum random delay added on top of latency_ms
+        seed: Seed for the jitter, so runs are repeatable
+    """
+
+    def __init__(
+        self,
+        kitty_count: int = 50,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        seed: int = 0,
+    ):
+        self.kitty_count = kitty_count
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self) -> "FakeShelterSite":
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _delay(self) -> float:
+        with self._random_lock:
+            jitter = self._random.uniform(0, self.jitter_ms)
+        return (self.latency_ms + jitter) / 1000
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(site._delay())
+
+                parts = [part for part in self.path.split("?")[0].split("/") if part]
+                if not parts:
+                    body = render_listing(site.kitty_count)
+                elif (
+                    len(parts) == 2
+                    and parts[0] == "pet"
+                    and parts[1].isdigit()
+                    and int(parts[1]) < site.kitty_count
+                ):
+                    body = render_detail(int(parts[1]))
+                else:
+                    self.send_error(404)
+                    return
+
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=UTF-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
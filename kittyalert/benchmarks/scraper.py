@@ -0,0 +1,139 @@
+"""Benchmark of scrape_shelter against a local fake shelter site"""
+
+import os
+import resource
+import statistics
+import threading
+import time
+from pathlib import Path
+
+from kittyalert.benchmarks.fake_site import FakeShelterSite
+from kittyalert.instrumentation import ScrapeStats
+from kittyalert.models import Shelter
+from kittyalert.scraper import scrape_shelter
+
+
+def process_tree_rss_mb() -> float | None:
+    """Resident memory of this process and all its descendants in megabytes.
+
+    This includes the Playwright driver and the Chromium processes it starts.
+
+    Returns:
+        The memory in megabytes, or None where /proc is not available
+    """
+    children: dict[int, list[int]] = {}
+    rss_kb: dict[int, int] = {}
+    try:
+        proc_dirs = [path for path in Path("/proc").iterdir() if path.name.isdigit()]
+    except OSError:
+        return None
+
+    for proc_dir in proc_dirs:
+        try:
+            status = (proc_dir / "status").read_text()
+        except OSError:
+            continue
+        fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+        pid = int(proc_dir.name)
+        children.setdefault(int(fields["PPid"]), []).append(pid)
+        rss_kb[pid] = int(fields.get("VmRSS", "0 kB").split()[0])
+
+    total_kb = 0
+    pending = [os.getpid()]
+    while pending:
+        pid = pending.pop()
+        total_kb += rss_kb.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total_kb / 1024
+
+
+class PeakMemorySampler:
+    """Samples process_tree_rss_mb in a background thread while in use"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "PeakMemorySampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss_mb = process_tree_rss_mb()
+            if rss_mb is None:
+                # Without /proc, fall back to this process's own peak.
+                self.peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                return
+            self.peak_mb = max(self.peak_mb, rss_mb)
+            self._stop.wait(self.interval)
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def run_scraper_benchmark(
+    kitty_count: int = 50,
+    latency_ms: float = 0,
+    jitter_ms: float = 0,
+    concurrency: int = 4,
+    engine: str = "playwright",
+    **scrape_options,
+) -> dict:
+    """Scrape a fake shelter site and measure throughput, latency and memory.
+
+    Args:
+        kitty_count: Number of kitties on the fake listing
+        latency_ms: Delay the fake site adds to every response
+        jitter_ms: Maximum random delay added on top of latency_ms
+        concurrency: Passed to scrape_shelter
+        engine: Passed to scrape_shelter
+        **scrape_options: Any other scrape_shelter arguments
+
+    Returns:
+        Dictionary with the kitties and errors found, pages per second, p50
+        and p95 per-page latency in milliseconds and peak RSS in megabytes
+    """
+    stats = ScrapeStats()
+
+    with FakeShelterSite(kitty_count, latency_ms, jitter_ms) as site:
+        # Measure each concurrency level as given, without rate limiting.
+        shelter = Shelter(
+            name="Benchmark Shelter",
+            scrape_url=site.url,
+            scrape_requests_per_second=0,
+            scrape_max_concurrency=concurrency,
+        )
+        with PeakMemorySampler() as memory:
+            started = time.perf_counter()
+            kitties, errors = scrape_shelter(
+                shelter,
+                concurrency=concurrency,
+                engine=engine,
+                stats=stats,
+                **scrape_options,
+            )
+            seconds = time.perf_counter() - started
+
+    page_ms = [page.seconds * 1000 for page in stats.pages]
+    return {
+        "engine": engine,
+        "concurrency": concurrency,
+        "kitties": len(kitties),
+        "errors": len(errors),
+        "pages": len(stats.pages),
+        "seconds": round(seconds, 3),
+        "pages_per_second": round(len(stats.pages) / seconds, 2),
+        "p50_page_ms": round(_percentile(page_ms, 50), 1),
+        "p95_page_ms": round(_percentile(page_ms, 95), 1),
+        "peak_rss_mb": round(memory.peak_mb, 1),
+    }
@@ -0,0 +1,103 @@
+"""A local stand-in SMTP server for email delivery benchmarks
+
+Speaks just enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT) for
+Django's SMTP backend to deliver to it, and throws the messages away. Opening
+a connection and every command can be delayed to imitate the round trips and
+TLS handshake of a remote mail server.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class FakeSMTPServer:
+    """A fake SMTP server served from a background thread.
+
+    Use it as a context manager; `host` and `port` are where it listens
+    while it runs, and `connections` and `messages` count what it received.
+
+    Args:
+        connect_latency_ms: Delay before greeting each new connection
+        command_latency_ms: Delay before answering each command
+        rejected: Recipient addresses to refuse, e.g. to test bounces
+    """
+
+    def __init__(
+        self,
+        connect_latency_ms: float = 0,
+        command_latency_ms: float = 0,
+        rejected: set[str] | None = None,
+    ):
+        self.connect_latency_ms = connect_latency_ms
+        self.command_latency_ms = command_latency_ms
+        self.rejected = rejected or set()
+        self.connections = 0
+        self.messages = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def __enter__(self) -> "FakeSMTPServer":
+        self._server = socketserver.ThreadingTCPServer(
+            ("127.0.0.1", 0), self._handler_class()
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                time.sleep(server.command_latency_ms / 1000)
+                self.wfile.write(f"{line}\r\n".encode())
+
+            def handle(self):
+                server._count("connections")
+                time.sleep(server.connect_latency_ms / 1000)
+                self.wfile.write(b"220 localhost fake ESMTP\r\n")
+
+                while line := self.rfile.readline():
+                    command = line.decode(errors="replace").strip()
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb in ("EHLO", "HELO", "MAIL", "RSET", "NOOP"):
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        address = command.partition(":")[2].strip().strip("<>")
+                        if address in server.rejected:
+                            self.reply("550 No such user here")
+                        else:
+                            self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.wfile.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                        while self.rfile.readline() not in (b".\r\n", b""):
+                            pass
+                        server._count("messages")
+                        self.reply("250 OK queued")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("500 Command not recognized")
+
+        return Handler
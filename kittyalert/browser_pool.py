@@ -0,0 +1,182 @@
+"""Long-lived Chromium pool for the 😻 Kitty Alert scraper
+
+Launching Chromium dominates short scrapes and its memory grows over long
+runs, so a BrowserPool keeps one browser running, hands out fresh contexts
+and replaces the browser after a number of page loads or once it uses too
+much memory.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from django.conf import settings
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger(__name__)
+
+
+async def browser_memory_mb(browser) -> float | None:
+    """Resident memory of all of a Chromium browser's processes in megabytes.
+
+    Returns:
+        The memory in megabytes, or None where it cannot be measured (non-Linux
+        platforms or non-Chromium browsers)
+    """
+    try:
+        session = await browser.new_browser_cdp_session()
+        try:
+            info = await session.send("SystemInfo.getProcessInfo")
+        finally:
+            await session.detach()
+    except Exception:  # Not Chromium, or the browser is going away
+        return None
+
+    total_kb = 0
+    for process in info["processInfo"]:
+        try:
+            status = Path(f"/proc/{process['id']}/status").read_text()
+        except OSError:
+            return None
+        for line in status.splitlines():
+            if line.startswith("VmRSS:"):
+                total_kb += int(line.split()[1])
+                break
+    return total_kb / 1024
+
+
+class _PooledBrowser:
+    """A launched browser and how much it has been used"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages_loaded = 0
+        self.active_contexts = 0
+        self.retiring = False
+
+
+class BrowserPool:
+    """Hands out fresh browser contexts from a long-lived Chromium.
+
+    Use it as an async context manager, then borrow contexts with
+    `async with pool.context() as context`. Every top-level navigation counts
+    as a page load. The browser is retired once it has loaded max_pages pages
+    or uses more than max_memory_mb; contexts already handed out keep working
+    and the old browser closes when the last of them is returned.
+
+    Args:
+        max_pages: Page loads after which the browser is replaced
+        max_memory_mb: Resident memory after which the browser is replaced
+        **launch_options: Passed to chromium.launch()
+    """
+
+    def __init__(
+        self,
+        max_pages: int | None = None,
+        max_memory_mb: int | None = None,
+        **launch_options,
+    ):
+        self.max_pages = max_pages or settings.SCRAPER_BROWSER_MAX_PAGES
+        self.max_memory_mb = max_memory_mb or settings.SCRAPER_BROWSER_MAX_MEMORY_MB
+        self.launch_options = {"headless": True, **launch_options}
+        self._playwright_manager = None
+        self._playwright = None
+        self._current: _PooledBrowser | None = None
+        self._browsers: set[_PooledBrowser] = set()
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "BrowserPool":
+        # Playwright is started on first use, so a pool that is only kept for
+        # the HTTP engine to fall back on costs nothing.
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Start Playwright ahead of first use, e.g. to fail early if it is
+        not installed. The first browser is launched on first use."""
+        if self._playwright is None:
+            self._playwright_manager = async_playwright()
+            self._playwright = await self._playwright_manager.start()
+
+    async def close(self):
+        """Close every browser and stop Playwright"""
+        for pooled in list(self._browsers):
+            await self._close_browser(pooled)
+        self._current = None
+        if self._playwright_manager is not None:
+            await self._playwright_manager.__aexit__(None, None, None)
+        self._playwright_manager = None
+        self._playwright = None
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """Borrow a fresh browser context, closed again on exit.
+
+        Args:
+            **context_options: Passed to browser.new_context()
+        """
+        pooled = await self._acquire()
+        try:
+            context = await pooled.browser.new_context(**context_options)
+            context.on("request", lambda request: self._on_request(pooled, request))
+            try:
+                yield context
+            finally:
+                await context.close()
+        finally:
+            pooled.active_contexts -= 1
+            if pooled.retiring and not pooled.active_contexts:
+                await self._close_browser(pooled)
+
+    async def _acquire(self) -> _PooledBrowser:
+        async with self._lock:
+            if self._current and await self._is_worn_out(self._current):
+                await self._retire(self._current)
+
+            if self._current is None:
+                if self._playwright is None:
+                    await self.start()
+                browser = await self._playwright.chromium.launch(**self.launch_options)
+                self._current = _PooledBrowser(browser)
+                self._browsers.add(self._current)
+                logger.info("Launched browser %s", browser.version)
+
+            self._current.active_contexts += 1
+            return self._current
+
+    async def _is_worn_out(self, pooled: _PooledBrowser) -> bool:
+        if not pooled.browser.is_connected():
+            logger.warning("Browser disconnected, replacing it")
+            return True
+        if pooled.pages_loaded >= self.max_pages:
+            logger.info("Recycling browser after %d page loads", pooled.pages_loaded)
+            return True
+
+        memory_mb = await browser_memory_mb(pooled.browser)
+        if memory_mb is not None and memory_mb > self.max_memory_mb:
+            logger.info("Recycling browser using %.0f MB", memory_mb)
+            return True
+        return False
+
+    async def _retire(self, pooled: _PooledBrowser):
+        pooled.retiring = True
+        self._current = None
+        if not pooled.active_contexts:
+            await self._close_browser(pooled)
+
+    async def _close_browser(self, pooled: _PooledBrowser):
+        if pooled not in self._browsers:
+            return
+        self._browsers.discard(pooled)
+        try:
+            await pooled.browser.close()
+        except Exception:  # Already crashed or disconnected
+            logger.debug("Browser was already closed", exc_info=True)
+
+    @staticmethod
+    def _on_request(pooled: _PooledBrowser, request):
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            pooled.pages_loaded += 1
@@ -1,10 +1,36 @@
 """Email notification utilities"""
 
+import contextlib
+import smtplib
+from collections.abc import Callable
+from dataclasses import dataclass
+from html import escape
+
 from django.conf import settings
-from django.core.mail import send_mail
+from django.core.cache import cache
+from django.core.mail import (
+    EmailMessage,
+    EmailMultiAlternatives,
+    get_connection,
+    send_mail,
+)
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .models import ScrapeRun
+
+# Stand-ins for the recipient-specific parts of a rendered notification. They
+# contain no characters HTML escaping would change.
+GREETING_PLACEHOLDER = "%%greeting%%"
+UNSUBSCRIBE_URL_PLACEHOLDER = "%%unsubscribe_url%%"
 
+# Seconds a rendered notification stays cached
+RENDER_CACHE_TIMEOUT = 60 * 60 * 24
 
-def send_email_notification(to_email: str, subject: str, message: str) -> bool:
+
+def send_email_notification(
+    to_email: str, subject: str, message: str, connection=None
+) -> bool:
     """
     Send an email notification.
 
@@ -12,6 +38,8 @@ def send_email_notification(to_email: str, subject: str, message: str) -> bool:
         to_email: Email address to send to
         subject: Email subject line
         message: Email message body (plain text)
+        connection: Email backend connection to send with (optional). By
+            default a new connection is opened and closed for this email.
 
     Returns:
         True if email was sent successfully, False otherwise
@@ -29,6 +57,7 @@ def send_email_notification(to_email: str, subject: str, message: str) -> bool:
             from_email=from_email,
             recipient_list=[to_email],
             fail_silently=False,
+            connection=connection,
         )
         return True
     except Exception as e:
@@ -39,28 +68,168 @@ def send_email_notification(to_email: str, subject: str, message: str) -> bool:
         return False
 
 
-def format_kitty_notification(
-    new_kitties: list[dict], shelter_name: str, shelter_url: str = ""
-) -> tuple[str, str]:
+def build_email_message(
+    to_email: str, subject: str, message: str, html_message: str | None = None
+) -> EmailMessage:
+    """Build an email from the default sender to one recipient, with an HTML
+    alternative to the plain text if html_message is given"""
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[to_email],
+    )
+    if html_message:
+        email.attach_alternative(html_message, "text/html")
+    return email
+
+
+class EmailNotSentError(smtplib.SMTPException):
+    """The email backend reported that it did not send an email"""
+
+
+def send_email_batch(
+    messages: list[EmailMessage],
+    connection=None,
+    throttle: Callable[[], None] | None = None,
+) -> list[Exception | None]:
     """
-    Format an email notification for new kitties.
+    Send emails over a single connection, opened once for the whole batch.
+
+    A failure to send one email does not stop the rest, whether the mail
+    server refused it or the message itself could not be built, e.g. because
+    of a newline in an address. After any other failure the connection is
+    reopened for the remaining emails.
 
     Args:
-        new_kitties: List of kitty data dictionaries
-        shelter_name: Name of the shelter
-        shelter_url: URL of the shelter's website (optional)
+        messages: Emails to send
+        connection: Email backend connection to send with (optional). By
+            default one is created from the EMAIL_* settings.
+        throttle: Called before each email is sent, e.g. to wait for a rate
+            limit (optional)
 
     Returns:
-        Tuple of (subject, message_body)
+        For each email, None if it was sent, or else the error it failed with
+    """
+    connection = connection or get_connection(fail_silently=False)
+    errors = []
+    try:
+        connection.open()
+    except OSError as e:  # Includes smtplib.SMTPException
+        return [e] * len(messages)
+
+    try:
+        for message in messages:
+            if throttle:
+                throttle()
+            try:
+                sent = connection.send_messages([message])
+            except Exception as e:
+                errors.append(e)
+                if isinstance(e, smtplib.SMTPRecipientsRefused):
+                    # The server rejected the address but kept the connection.
+                    continue
+                # The connection may be left partway through a message.
+                connection.close()
+                # If the server cannot be reached again, send_messages tries
+                # a new connection for each remaining email.
+                with contextlib.suppress(OSError):
+                    connection.open()
+            else:
+                errors.append(None if sent else EmailNotSentError("Email was not sent"))
+    finally:
+        connection.close()
+    return errors
+
+
+def is_permanent_email_error(error: BaseException) -> bool:
+    """Whether sending an email again cannot succeed, e.g. because the mail
+    server rejected the address (a 5xx reply) or the message could not be
+    built"""
+    if not isinstance(error, OSError):
+        # Not a network or mail server error, so a fault of the message itself
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def recipient_greeting(adopter) -> str:
+    user = adopter.user
+    return f"Hi {user.first_name or user.username},"
+
+
+def unsubscribe_url(adopter, shelter) -> str:
+    return settings.SITE_URL + reverse(
+        "unsubscribe_from_shelter", args=[adopter.id, shelter.id]
+    )
+
+
+@dataclass(frozen=True)
+class RenderedNotification:
+    """A new kitties email, rendered once for all of a shelter's subscribers
+    with placeholders for the parts that differ per recipient"""
+
+    subject: str
+    text: str
+    html: str
+    kitty_count: int
+
+    def personalize(self, greeting: str, unsubscribe_url: str) -> tuple[str, str]:
+        """
+        Fill in the recipient's greeting and unsubscribe link.
+
+        Returns:
+            Tuple of (plain text body, HTML body)
+        """
+        text = self.text.replace(GREETING_PLACEHOLDER, greeting).replace(
+            UNSUBSCRIBE_URL_PLACEHOLDER, unsubscribe_url
+        )
+        html = self.html.replace(GREETING_PLACEHOLDER, escape(greeting)).replace(
+            UNSUBSCRIBE_URL_PLACEHOLDER, escape(unsubscribe_url)
+        )
+        return text, html
+
+
+def render_kitty_notification(
+    scrape_run: ScrapeRun, previous_scrape_run: ScrapeRun
+) -> RenderedNotification:
     """
-    subject = f"🐱 New kitties available for adoption at {shelter_name}!"
+    Render the email about the kitties a scrape run found since a previous
+    run of the same shelter.
 
-    message = f"There are new kitties at {shelter_name} since yesterday!\n\n"
-    message += f"Visit {shelter_url} to see all new kitties!\n\n"
+    Completed runs do not change, so the result is cached and shared by
+    every subscriber compared against the same previous run.
 
-    for kitty in new_kitties:
-        name = kitty["name"]
-        link = kitty["link"]
-        message += f"• {name}: {link}\n"
+    Args:
+        scrape_run: The shelter's latest scrape run
+        previous_scrape_run: The run subscribers were last notified about
+
+    Returns:
+        The rendered email, with kitty_count 0 if there are no new kitties
+    """
+    cache_key = f"kitty_notification_{scrape_run.id}_{previous_scrape_run.id}"
+    rendered = cache.get(cache_key)
+    if rendered is not None:
+        return rendered
 
-    return subject, message
+    shelter = scrape_run.shelter
+    kitties = list(
+        scrape_run.kitties_added_since(previous_scrape_run).only("name", "link")
+    )
+    context = {
+        "shelter": shelter,
+        "kitties": kitties,
+        "greeting": GREETING_PLACEHOLDER,
+        "unsubscribe_url": UNSUBSCRIBE_URL_PLACEHOLDER,
+    }
+    rendered = RenderedNotification(
+        subject=f"🐱 New kitties available for adoption at {shelter.name}!",
+        text=render_to_string("emails/kitty_notification.txt", context),
+        html=render_to_string("emails/kitty_notification.html", context),
+        kitty_count=len(kitties),
+    )
+    cache.set(cache_key, rendered, RENDER_CACHE_TIMEOUT)
+    return rendered
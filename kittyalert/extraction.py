@@ -0,0 +1,163 @@
+"""DOM extraction for the 😻 Kitty Alert scraper
+
+Each page is read with a single `page.evaluate` call that returns plain data,
+instead of one protocol round trip per element and attribute. The same data
+can be read from raw HTML with selectolax for the HTTP engine.
+"""
+
+import re
+from typing import Any
+
+from selectolax.lexbor import LexborHTMLParser
+
+LISTING_SELECTOR = ".adoption__item"
+DESCRIPTION_SELECTOR = (
+    ".elementor-widget-theme-post-content .elementor-widget-container"
+)
+FACTS_SELECTOR = ".elementor-widget-adoption-facts .elementor-widget-container"
+IMAGE_SELECTOR = ".swiper-slide-image"
+
+FACT_LABELS = ("age", "weight", "gender", "breed")
+
+LISTING_SCRIPT = """
+() => Array.from(document.querySelectorAll(".adoption__item"), (card) => {
+    const name = card.querySelector(".adoption__item--name a");
+    const location = card.querySelector("div:nth-child(3)");
+    return {
+        name: name ? name.innerText.trim() : null,
+        link: name ? name.getAttribute("href") : null,
+        location: location ? location.innerText.trim() : "N/A",
+    };
+})
+"""
+
+DETAIL_SCRIPT = """
+([descriptionSelector, factsSelector, imageSelector]) => {
+    const description = document.querySelector(descriptionSelector);
+    const facts = document.querySelector(factsSelector);
+    return {
+        description: description ? description.innerHTML : null,
+        facts: facts
+            ? Array.from(facts.querySelectorAll("p"), (p) => p.innerText.trim())
+            : null,
+        image_urls: Array.from(
+            document.querySelectorAll(imageSelector),
+            (img) => img.getAttribute("src"),
+        ),
+    };
+}
+"""
+
+
+class ExtractionError(Exception):
+    """Raised when a page does not have the expected structure"""
+
+
+def _inner_text(node) -> str:
+    """Approximate a rendered element's innerText from its markup"""
+    return re.sub(r"\s+", " ", node.text(deep=True)).strip()
+
+
+def parse_listing_html(html: str) -> list[dict[str, str]] | None:
+    """Read the kitty cards from a listing page's HTML.
+
+    Returns:
+        The same cards as extract_listing, or None when the page has no
+        kitty cards (for example when they are rendered by JavaScript)
+    """
+    cards = []
+    for card in LexborHTMLParser(html).css(LISTING_SELECTOR):
+        name = card.css_first(".adoption__item--name a")
+        if name is None or name.attributes.get("href") is None:
+            raise ExtractionError("Kitty card without a name link")
+        location = card.css_first("div:nth-child(3)")
+        cards.append(
+            {
+                "name": _inner_text(name),
+                "link": name.attributes["href"],
+                "location": _inner_text(location) if location else "N/A",
+            }
+        )
+    return cards or None
+
+
+def parse_detail_html(html: str) -> dict[str, Any] | None:
+    """Read the kitty fields from a detail page's HTML.
+
+    Returns:
+        The same fields as extract_detail, or None when the page has no
+        adoption facts widget
+    """
+    tree = LexborHTMLParser(html)
+    facts = tree.css_first(FACTS_SELECTOR)
+    if facts is None:
+        return None
+
+    description = tree.css_first(DESCRIPTION_SELECTOR)
+    return parse_detail(
+        {
+            "description": description.inner_html if description else None,
+            "facts": [_inner_text(p) for p in facts.css("p")],
+            "image_urls": [
+                img.attributes.get("src") for img in tree.css(IMAGE_SELECTOR)
+            ],
+        }
+    )
+
+
+async def extract_listing(page) -> list[dict[str, str]]:
+    """Read the name, link and location of every kitty card on a listing page.
+
+    Args:
+        page: A Playwright page showing a shelter's listing
+
+    Returns:
+        List of dictionaries with name, link and location, in listing order
+    """
+    cards = await page.evaluate(LISTING_SCRIPT)
+    for card in cards:
+        if card["link"] is None:
+            raise ExtractionError("Kitty card without a name link")
+    return cards
+
+
+async def extract_detail(page) -> dict[str, Any]:
+    """Read the description, facts and image URLs from a kitty detail page.
+
+    Args:
+        page: A Playwright page showing a kitty's detail page
+
+    Returns:
+        Dictionary with description, age, weight, gender, breed and image_urls
+    """
+    detail = await page.evaluate(
+        DETAIL_SCRIPT, [DESCRIPTION_SELECTOR, FACTS_SELECTOR, IMAGE_SELECTOR]
+    )
+    return parse_detail(detail)
+
+
+def parse_detail(detail: dict[str, Any]) -> dict[str, Any]:
+    """Turn the raw values read from a detail page into kitty fields.
+
+    Args:
+        detail: Dictionary with description HTML (or None), the text of each
+            fact paragraph (or None) and image_urls
+
+    Returns:
+        Dictionary with description, age, weight, gender, breed and image_urls
+    """
+    facts = detail["facts"]
+    if facts is None:
+        raise ExtractionError("Missing adoption facts")
+    if len(facts) < len(FACT_LABELS):
+        raise ExtractionError(f"Expected {len(FACT_LABELS)} facts, found {len(facts)}")
+
+    kitty_data = {
+        "description": detail["description"]
+        if detail["description"] is not None
+        else "Unknown",
+        "image_urls": detail["image_urls"],
+    }
+    for label, text in zip(FACT_LABELS, facts):
+        kitty_data[label] = text.split(f"{label.capitalize()}:")[-1]
+    return kitty_data
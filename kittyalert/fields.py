@@ -0,0 +1,42 @@
+"""Custom model fields for 😻 Kitty Alert"""
+
+import gzip
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class CompressedJSONField(models.BinaryField):
+    """A JSON value stored gzipped.
+
+    Reads and writes like a JSONField, but the database only holds the
+    compressed bytes, so the value cannot be queried with JSON lookups.
+    Values saved before a column was compressed are read back as plain JSON.
+    """
+
+    description = "Gzipped JSON"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+        value = bytes(value)
+        if value[:2] == b"\x1f\x8b":  # The gzip magic number
+            value = gzip.decompress(value)
+        return json.loads(value)
+
+    def to_python(self, value):
+        # Serialized values, e.g. from loaddata, are JSON strings.
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return gzip.compress(json.dumps(value, cls=DjangoJSONEncoder).encode())
+
+    def value_to_string(self, obj):
+        return json.dumps(self.value_from_object(obj), cls=DjangoJSONEncoder)
@@ -0,0 +1,142 @@
+"""On-disk response cache for the 😻 Kitty Alert HTTP scrape engine
+
+Each URL is stored as one gzipped JSON file holding the validators
+(ETag/Last-Modified) needed for conditional requests, a hash of the body,
+the body itself and the data extracted from it. Once the directory grows past
+its size limit the least recently used entries are removed.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """What is remembered about a previously fetched page"""
+
+    url: str
+    body: str
+    body_hash: str
+    etag: str | None = None
+    last_modified: str | None = None
+    extracted: Any = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers asking the server to reply 304 if the page is unchanged"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Size-bounded on-disk cache of pages keyed by URL.
+
+    Safe to share between threads; writes are atomic so several processes can
+    use the same directory.
+
+    Args:
+        directory: Where the cache files are stored, created if missing
+        max_bytes: Size of the directory above which old entries are evicted
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = sum(path.stat().st_size for path in self._files())
+
+    @classmethod
+    def from_settings(cls) -> "ResponseCache | None":
+        """The cache configured by the SCRAPER_CACHE_* settings, if enabled"""
+        if not settings.SCRAPER_CACHE_DIR:
+            return None
+        return cls(settings.SCRAPER_CACHE_DIR, settings.SCRAPER_CACHE_MAX_BYTES)
+
+    def _files(self):
+        return self.directory.glob("*.json.gz")
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json.gz"
+
+    def get(self, url: str) -> CacheEntry | None:
+        """Return the entry for url, marking it as recently used"""
+        path = self._path(url)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as cache_file:
+                entry = CacheEntry(**json.load(cache_file))
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception:  # Corrupt or written by an incompatible version
+            logger.warning("Discarding unreadable cache entry for %s", url)
+            self._remove(path)
+            return None
+        return entry if entry.url == url else None
+
+    def put(self, entry: CacheEntry):
+        """Store entry, evicting the least recently used entries if needed"""
+        path = self._path(entry.url)
+        data = gzip.compress(json.dumps(asdict(entry)).encode())
+
+        with tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        ) as temp_file:
+            temp_file.write(data)
+
+        with self._lock:
+            try:
+                self._size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(temp_file.name, path)
+            self._size += len(data)
+
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _remove(self, path: Path):
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            self._size -= size
+
+    def _evict(self):
+        """Remove the least recently used entries until 90% of max_bytes"""
+        target = self.max_bytes * 0.9
+        paths = []
+        for path in self._files():
+            try:
+                paths.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+
+        evicted = 0
+        for _, path in sorted(paths):
+            if self._size <= target:
+                break
+            self._remove(path)
+            evicted += 1
+        logger.info("Evicted %d entries from the response cache", evicted)
@@ -0,0 +1,147 @@
+"""HTTP scrape engine for the 😻 Kitty Alert scraper
+
+Shelter pages that are rendered on the server can be read without a browser:
+pages are fetched over pooled keep-alive connections and parsed with
+selectolax. Any page missing the expected nodes is fetched again with the
+browser engine it falls back on. With a ResponseCache, pages are requested
+conditionally and unchanged pages reuse the data extracted last time.
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+
+from .extraction import parse_detail_html, parse_listing_html
+from .http_cache import CacheEntry, ResponseCache, body_hash
+from .instrumentation import PageStats, ScrapeStats, phase
+from .page_archive import PageArchive
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+)
+
+
+class HttpEngine:
+    """Fetches and extracts pages over plain HTTP.
+
+    Args:
+        fallback: The engine to use for pages that lack the expected nodes,
+            e.g. because they are rendered by JavaScript
+        concurrency: Maximum number of connections to keep open
+        stats: Optional ScrapeStats to record each page load into
+        cache: Optional ResponseCache for conditional requests
+        archive: Optional PageArchive to record responses to or replay from
+    """
+
+    def __init__(
+        self,
+        fallback,
+        concurrency: int,
+        stats: ScrapeStats | None = None,
+        cache: ResponseCache | None = None,
+        archive: PageArchive | None = None,
+    ):
+        self.fallback = fallback
+        self.concurrency = concurrency
+        self.stats = stats
+        self.cache = cache
+        self.archive = archive
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self) -> "HttpEngine":
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+            **(self.archive.httpx_options() if self.archive else {}),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+
+    async def _get(self, url: str, headers: dict[str, str]) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self._client.get(url, headers=headers)
+        if self.stats is not None:
+            self.stats.add_page(
+                PageStats(
+                    url=url,
+                    seconds=time.perf_counter() - started,
+                    bytes_received=len(response.content),
+                    requests=1,
+                    blocked_requests=0,
+                    cached=response.status_code == httpx.codes.NOT_MODIFIED,
+                )
+            )
+        if response.status_code != httpx.codes.NOT_MODIFIED:
+            response.raise_for_status()
+        return response
+
+    async def _fetch(self, url: str, parse: Callable[[str], Any], kind: str) -> Any:
+        """Fetch and parse url, reusing the cached result if it is unchanged.
+
+        The request and the parsing are timed as the `kind`_request and
+        `kind`_parse phases.
+
+        Returns:
+            What parse returned for the page body, or None if the page lacks
+            the expected nodes
+        """
+        entry = self.cache.get(url) if self.cache else None
+        with phase(self.stats, f"{kind}_request"):
+            response = await self._get(
+                url, entry.conditional_headers() if entry else {}
+            )
+
+        if entry and response.status_code == httpx.codes.NOT_MODIFIED:
+            if entry.extracted is not None:
+                return entry.extracted
+            with phase(self.stats, f"{kind}_parse"):
+                return parse(entry.body)
+
+        content_hash = body_hash(response.content)
+        if entry and entry.body_hash == content_hash and entry.extracted is not None:
+            extracted = entry.extracted
+        else:
+            with phase(self.stats, f"{kind}_parse"):
+                extracted = parse(response.text)
+
+        if self.cache and extracted is not None:
+            self.cache.put(
+                CacheEntry(
+                    url=url,
+                    body=response.text,
+                    body_hash=content_hash,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    extracted=extracted,
+                )
+            )
+        return extracted
+
+    async def fetch_listing(self, url: str) -> list[dict[str, str]]:
+        """Return the kitty cards on a listing page"""
+        card_links = await self._fetch(url, parse_listing_html, "listing")
+        if card_links is None:
+            logger.info("No kitty cards in the HTML of %s, using the browser", url)
+            return await self.fallback.fetch_listing(url)
+        return card_links
+
+    async def fetch_detail(self, url: str) -> dict[str, Any]:
+        """Return the fields extracted from a kitty detail page"""
+        kitty_data = await self._fetch(url, parse_detail_html, "detail")
+        if kitty_data is None:
+            logger.info("No adoption facts in the HTML of %s, using the browser", url)
+            return await self.fallback.fetch_detail(url)
+        return kitty_data
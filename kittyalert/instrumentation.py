@@ -0,0 +1,158 @@
+"""Instrumentation for the 😻 Kitty Alert scraper"""
+
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageStats:
+    """Network and timing figures for a single page load"""
+
+    url: str
+    seconds: float
+    bytes_received: int
+    requests: int
+    blocked_requests: int
+    cached: bool = False
+
+
+@dataclass
+class PhaseStats:
+    """Time spent in one phase of scraping, e.g. waiting for selectors"""
+
+    count: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+@dataclass
+class ConcurrencyChange:
+    """A change the concurrency controller made while scraping"""
+
+    old_limit: int
+    new_limit: int
+    reason: str
+
+
+@dataclass
+class ScrapeStats:
+    """Figures collected while scraping a shelter"""
+
+    pages: list[PageStats] = field(default_factory=list)
+    concurrency_changes: list[ConcurrencyChange] = field(default_factory=list)
+    phases: dict[str, PhaseStats] = field(default_factory=dict)
+    retries: int = 0
+    timeouts: int = 0
+
+    def add_page(self, page_stats: PageStats):
+        self.pages.append(page_stats)
+        logger.info(
+            "Loaded %s in %.2fs: %d bytes over %d requests, %d requests blocked",
+            page_stats.url,
+            page_stats.seconds,
+            page_stats.bytes_received,
+            page_stats.requests,
+            page_stats.blocked_requests,
+        )
+
+    def add_phase(self, name: str, seconds: float):
+        phase_stats = self.phases.setdefault(name, PhaseStats())
+        phase_stats.count += 1
+        phase_stats.seconds += seconds
+        phase_stats.max_seconds = max(phase_stats.max_seconds, seconds)
+        logger.debug("phase=%s seconds=%.3f", name, seconds)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as one occurrence of a phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    def summary(self) -> dict:
+        """Totals across all pages, suitable for logging or storing as JSON"""
+        seconds = sum(page.seconds for page in self.pages)
+        return {
+            "pages": len(self.pages),
+            "page_seconds": round(seconds, 3),
+            "mean_page_seconds": round(seconds / len(self.pages), 3)
+            if self.pages
+            else 0,
+            "bytes_received": sum(page.bytes_received for page in self.pages),
+            "requests": sum(page.requests for page in self.pages),
+            "blocked_requests": sum(page.blocked_requests for page in self.pages),
+            "cached_pages": sum(page.cached for page in self.pages),
+            "concurrency_changes": len(self.concurrency_changes),
+            "final_concurrency": self.concurrency_changes[-1].new_limit
+            if self.concurrency_changes
+            else None,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "phases": {
+                name: {
+                    "count": phase_stats.count,
+                    "seconds": round(phase_stats.seconds, 3),
+                    "mean_seconds": round(phase_stats.seconds / phase_stats.count, 3),
+                    "max_seconds": round(phase_stats.max_seconds, 3),
+                }
+                for name, phase_stats in sorted(self.phases.items())
+            },
+        }
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def phase(stats: ScrapeStats | None, name: str):
+    """stats.phase(name), or a no-op when there are no stats to record into"""
+    return stats.phase(name) if stats is not None else nullcontext()
+
+
+class PageMeter:
+    """Counts the network traffic of one Playwright page between resets.
+
+    Args:
+        page: A Playwright page
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.reset()
+        page.on("requestfinished", self._on_request_finished)
+
+    def reset(self):
+        """Start measuring a new page load"""
+        self.started = time.perf_counter()
+        self.bytes_received = 0
+        self.requests = 0
+        self.blocked_requests = 0
+
+    def record(self, stats: ScrapeStats | None, url: str):
+        """Add the figures since the last reset to stats"""
+        if stats is None:
+            return
+        stats.add_page(
+            PageStats(
+                url=url,
+                seconds=time.perf_counter() - self.started,
+                bytes_received=self.bytes_received,
+                requests=self.requests,
+                blocked_requests=self.blocked_requests,
+            )
+        )
+
+    async def _on_request_finished(self, request):
+        self.requests += 1
+        try:
+            sizes = await request.sizes()
+        except Exception:  # The page may have navigated away already
+            return
+        self.bytes_received += sizes["responseHeadersSize"] + max(
+            sizes["responseBodySize"], 0
+        )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from kittyalert.benchmarks.email_delivery import run_email_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark notification email delivery against a local SMTP server"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--emails", type=int, default=200, help="Number of emails to send"
+        )
+        parser.add_argument(
+            "--connect-latency-ms",
+            type=float,
+            default=50,
+            help="Delay the SMTP server adds before greeting each connection, "
+            "standing in for the TCP and TLS handshakes",
+        )
+        parser.add_argument(
+            "--command-latency-ms",
+            type=float,
+            default=5,
+            help="Delay the SMTP server adds to every command",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            nargs="+",
+            default=[10, 100],
+            help="Batch size(s) to benchmark against sending each email on its "
+            "own connection",
+        )
+
+    def handle(self, *args, **options):
+        for batch_size in [None, *options["batch_size"]]:
+            result = run_email_benchmark(
+                email_count=options["emails"],
+                connect_latency_ms=options["connect_latency_ms"],
+                command_latency_ms=options["command_latency_ms"],
+                batch_size=batch_size,
+            )
+            self.stdout.write(
+                f"{result['mode']:<10}: {result['emails_per_second']:>8.2f} emails/s "
+                f"over {result['connections']:>4} connection(s) "
+                f"({result['emails']} sent, {result['failed']} failed "
+                f"in {result['seconds']:.2f}s)"
+            )
@@ -0,0 +1,27 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from kittyalert.benchmarks.extraction import run_extraction_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark DOM extraction round trips against saved shelter pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="Number of timed extractions per approach and page",
+        )
+
+    def handle(self, *args, **options):
+        results = asyncio.run(run_extraction_benchmark(options["iterations"]))
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<20} {result['round_trips']:>4} round trip(s) "
+                f"median {result['median_ms']:>8.3f} ms "
+                f"min {result['min_ms']:>8.3f} ms"
+            )
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+
+from kittyalert.benchmarks.scraper import run_scraper_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark the scraper against a local fake shelter site"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kitties", type=int, default=50, help="Number of kitties on the site"
+        )
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=50,
+            help="Delay the fake site adds to every response",
+        )
+        parser.add_argument(
+            "--jitter-ms",
+            type=float,
+            default=25,
+            help="Maximum random delay added on top of the latency",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 4],
+            help="Concurrency level(s) to benchmark",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=["playwright", "http"],
+            nargs="+",
+            default=["playwright", "http"],
+            help="Scrape engine(s) to benchmark",
+        )
+
+    def handle(self, *args, **options):
+        for engine in options["engine"]:
+            for concurrency in options["concurrency"]:
+                result = run_scraper_benchmark(
+                    kitty_count=options["kitties"],
+                    latency_ms=options["latency_ms"],
+                    jitter_ms=options["jitter_ms"],
+                    concurrency=concurrency,
+                    engine=engine,
+                )
+                self.stdout.write(
+                    f"{result['engine']:<10} concurrency {result['concurrency']:>3}: "
+                    f"{result['pages_per_second']:>7.2f} pages/s, "
+                    f"p50 {result['p50_page_ms']:>7.1f} ms, "
+                    f"p95 {result['p95_page_ms']:>7.1f} ms, "
+                    f"peak RSS {result['peak_rss_mb']:>7.1f} MB "
+                    f"({result['kitties']} kitties, {result['errors']} errors "
+                    f"in {result['seconds']:.2f}s)"
+                )
@@ -0,0 +1,125 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce, Length
+
+from kittyalert.models import Notification, ScrapedKitty, ScrapeRun, Shelter
+
+
+def error_summary(errors: list | None) -> list[dict]:
+    """One error record per code, counting the errors it stands for"""
+    counts = Counter(
+        error["code"] if isinstance(error, dict) else "unknown"
+        for error in errors or []
+    )
+    return [
+        {"code": code, "link": None, "message": f"{count} errors", "count": count}
+        for code, count in counts.items()
+    ]
+
+
+class Command(BaseCommand):
+    help = "Thin old scrape runs down to summaries to keep the database small"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=settings.SCRAPE_RUNS_KEPT,
+            help="Number of each shelter's most recent runs to keep in full",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be compacted without changing anything",
+        )
+        parser.add_argument(
+            "--vacuum",
+            action="store_true",
+            help="Run VACUUM afterwards so SQLite gives the space back to the disk",
+        )
+
+    def handle(self, *args, **options):
+        scrape_run_ids = self.compactable_scrape_run_ids(max(1, options["keep"]))
+        scrape_runs = ScrapeRun.objects.filter(id__in=scrape_run_ids)
+        stored_bytes = self.stored_bytes(scrape_runs)
+        scraped_kitties = ScrapedKitty.objects.filter(scrape_run__in=scrape_runs)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would compact {len(scrape_run_ids)} scrape run(s), removing "
+                f"{scraped_kitties.count()} scraped kitties and up to "
+                f"{stored_bytes} bytes of raw data and errors"
+            )
+            return
+
+        with transaction.atomic():
+            deleted, _ = scraped_kitties.delete()
+            for scrape_run in scrape_runs.only("id", "errors"):
+                scrape_run.errors = error_summary(scrape_run.errors)
+                scrape_run.raw_data = None
+                scrape_run.is_compacted = True
+                scrape_run.save(
+                    update_fields=["errors", "raw_data", "is_compacted", "modified"]
+                )
+        reclaimed = stored_bytes - self.stored_bytes(scrape_runs)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Compacted {len(scrape_run_ids)} scrape run(s): removed "
+                f"{deleted} scraped kitties and {reclaimed} bytes of raw data "
+                "and errors"
+            )
+        )
+
+        if options["vacuum"] and connection.vendor == "sqlite":
+            size_before = self.sqlite_file_size()
+            with connection.cursor() as cursor:
+                cursor.execute("VACUUM")
+            self.stdout.write(
+                f"VACUUM reclaimed {size_before - self.sqlite_file_size()} bytes "
+                "of database file"
+            )
+
+    def compactable_scrape_run_ids(self, keep: int) -> list[int]:
+        """Completed, not yet compacted runs that are neither among their
+        shelter's `keep` most recent completed runs nor referenced by a
+        notification.
+
+        Only completed runs count towards `keep`, so stuck or abandoned runs
+        cannot push out the latest completed run, which the next scrape reads
+        its known kitties and delta from. That run is never compacted.
+        """
+        notified_ids = Notification.objects.values("scrape_run_id")
+        scrape_run_ids = []
+        for shelter in Shelter.objects.all():
+            completed_scrape_runs = shelter.scrape_runs.filter(status="completed")
+            # At least one run is kept, and the newest is the latest completed.
+            kept_ids = completed_scrape_runs.order_by("-created").values_list(
+                "id", flat=True
+            )[: max(1, keep)]
+            scrape_run_ids += (
+                completed_scrape_runs.filter(is_compacted=False)
+                .exclude(id__in=list(kept_ids))
+                .exclude(id__in=notified_ids)
+                .values_list("id", flat=True)
+            )
+        return scrape_run_ids
+
+    def stored_bytes(self, scrape_runs) -> int:
+        """Bytes the runs' compressed raw data and errors take up"""
+        return scrape_runs.aggregate(
+            total=Coalesce(Sum(Length("raw_data")), 0)
+            + Coalesce(Sum(Length("errors")), 0)
+        )["total"]
+
+    def sqlite_file_size(self) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA page_count")
+            (page_count,) = cursor.fetchone()
+            cursor.execute("PRAGMA page_size")
+            (page_size,) = cursor.fetchone()
+        return page_count * page_size
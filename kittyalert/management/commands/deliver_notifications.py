@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from kittyalert.outbox import (
+    DeliveryResult,
+    RateLimiter,
+    claim_notifications,
+    deliver_claimed,
+    retry_policy_from_settings,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Send queued notification emails. Several can run at once, e.g. one per host."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.NOTIFICATION_DELIVERY_WORKERS,
+            help="Number of threads sending emails",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EMAIL_BATCH_SIZE,
+            help="Number of emails each thread sends over one connection",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=settings.NOTIFICATION_RATE_LIMIT,
+            help="Most emails all deliver_notifications processes together send "
+            "per second, or 0 for no limit",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=None,
+            help="Keep running, checking for queued notifications every this many "
+            "seconds, instead of exiting once the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        batch_size = max(1, options["batch_size"])
+        rate_limiter = RateLimiter("notifications", options["rate"])
+        retry_policy = retry_policy_from_settings()
+        total = DeliveryResult()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                notifications = claim_notifications(
+                    workers * batch_size,
+                    settings.NOTIFICATION_CLAIM_TIMEOUT,
+                    retry_policy.attempts,
+                )
+                if not notifications:
+                    if options["poll_interval"] is None:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                result = deliver_claimed(
+                    notifications, executor, rate_limiter, batch_size, retry_policy
+                )
+                self.stdout.write(
+                    f"Delivered {len(notifications)} notification(s): "
+                    f"{result.sent} sent, {result.retried} to retry, "
+                    f"{result.failed} failed"
+                )
+                total.sent += result.sent
+                total.retried += result.retried
+                total.failed += result.failed
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nNotifications sent: {total.sent} | To retry: {total.retried} | "
+                f"Failed: {total.failed}"
+            )
+        )
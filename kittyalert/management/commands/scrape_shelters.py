@@ -1,42 +1,292 @@
+import cProfile
+import json
+import logging
+import queue
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from datetime import timedelta
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
 
+from kittyalert.http_cache import ResponseCache
+from kittyalert.instrumentation import ScrapeStats
 from kittyalert.models import ScrapeRun, Shelter
-from kittyalert.scraper import scrape_shelter
+from kittyalert.page_archive import PageArchive
+from kittyalert.pipeline import ScrapeRunWriter, run_kitty_data
+from kittyalert.request_policy import RequestPolicy
+from kittyalert.scraper import ScrapeLoop, iter_scrape_shelter
+
+logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
     help = "Scrape all shelters for new kitties"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.SCRAPER_CONCURRENCY,
+            help="Number of kitty detail pages to fetch in parallel per shelter",
+        )
+        parser.add_argument(
+            "--max-browsers",
+            type=int,
+            default=settings.SCRAPER_MAX_BROWSERS,
+            help="Number of shelters to scrape in parallel, each with its own browser",
+        )
+        parser.add_argument(
+            "--full-refresh",
+            action="store_true",
+            help="Scrape every detail page instead of reusing unchanged kitties",
+        )
+        parser.add_argument(
+            "--no-block-resources",
+            action="store_true",
+            help="Download images, fonts, media and trackers, e.g. to compare traffic",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=["playwright", "http"],
+            help="Scrape every shelter with this engine instead of its own setting",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Fetch every page in full instead of using the response cache",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Finish each shelter's interrupted scrape run instead of starting "
+            "a new one, skipping kitties it already scraped",
+        )
+        parser.add_argument(
+            "--profile",
+            metavar="FILE",
+            help="Write a cProfile dump of the whole command to FILE, e.g. for "
+            "snakeviz or python -m pstats",
+        )
+        archive = parser.add_mutually_exclusive_group()
+        archive.add_argument(
+            "--record",
+            metavar="DIR",
+            help="Write every fetched page to a page archive in DIR",
+        )
+        archive.add_argument(
+            "--replay",
+            metavar="DIR",
+            help="Serve pages from the page archive in DIR instead of the network",
+        )
+
     def handle(self, *args, **options):
-        shelters = Shelter.objects.all()
+        if not options["profile"]:
+            self.scrape_all(options)
+            return
+
+        # On Python 3.12+ the profiler sees every thread, including the
+        # scraper threads and their event loops.
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            self.scrape_all(options)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(options["profile"])
+            self.stdout.write(f"Wrote profile to {options['profile']}")
+
+    def scrape_all(self, options):
+        """Scrape every shelter, several at once if max_browsers allows"""
+        shelters = list(Shelter.objects.all())
         scrape_runs = []
+        options["cache"] = (
+            None if options["no_cache"] else ResponseCache.from_settings()
+        )
+        if options["record"]:
+            options["archive"] = PageArchive(options["record"], "record")
+        elif options["replay"]:
+            options["archive"] = PageArchive(options["replay"], "replay")
+        else:
+            options["archive"] = None
+        max_browsers = max(1, options["max_browsers"])
+
+        # Each ScrapeLoop keeps one browser running across the shelters it
+        # scrapes, so Chromium is launched once per loop rather than once per
+        # shelter.
+        with ExitStack() as stack:
+            if max_browsers == 1:
+                scrape_loop = stack.enter_context(ScrapeLoop())
+                for shelter in shelters:
+                    scrape_runs.append(self.scrape(shelter, options, scrape_loop))
+            else:
+                # Each worker thread borrows a loop and its browser while it
+                # scrapes a shelter, so the total run time is bounded by the
+                # slowest shelter.
+                scrape_loops = queue.SimpleQueue()
+                for _ in range(max_browsers):
+                    scrape_loops.put(stack.enter_context(ScrapeLoop()))
+                executor = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=max_browsers)
+                )
+                futures = [
+                    executor.submit(
+                        self.scrape_in_worker, shelter, options, scrape_loops
+                    )
+                    for shelter in shelters
+                ]
+                for future in as_completed(futures):
+                    scrape_runs.append(future.result())
+
+        scrape_run_ids = [str(scrape_run.id) for scrape_run in scrape_runs]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Completed {len(scrape_run_ids)} scrape run(s) with ids: {', '.join(scrape_run_ids)}"
+            )
+        )
+
+    def scrape_in_worker(self, shelter, options, scrape_loops) -> ScrapeRun:
+        """Scrape a shelter from a worker thread on a loop borrowed from
+        scrape_loops, releasing its DB connection"""
+        scrape_loop = scrape_loops.get()
+        try:
+            return self.scrape(shelter, options, scrape_loop)
+        finally:
+            scrape_loops.put(scrape_loop)
+            connection.close()
 
-        for shelter in shelters:
+    def scrape(self, shelter, options, scrape_loop: ScrapeLoop) -> ScrapeRun:
+        """Scrape a single shelter on scrape_loop and record the results as a
+        ScrapeRun"""
+        scrape_run = options["resume"] and shelter.latest_unfinished_scrape_run()
+        if scrape_run:
+            self.stdout.write(
+                f"Resuming scrape run {scrape_run.id} for {shelter.name}..."
+            )
+            known_kitties = self.known_kitties(
+                shelter, options["full_refresh"] or scrape_run.is_full_refresh
+            )
+            skip_links = self.resume(scrape_run)
+        else:
             self.stdout.write(f"Fetching kitties from {shelter.name}...")
-            scrape_run = ScrapeRun.objects.create(status="running", shelter=shelter)
+            known_kitties = self.known_kitties(shelter, options["full_refresh"])
+            scrape_run = ScrapeRun.objects.create(
+                status="running",
+                shelter=shelter,
+                is_full_refresh=known_kitties is None,
+            )
+            skip_links = None
+        abandoned_count = shelter.abandon_unfinished_scrape_runs(scrape_run)
+        if abandoned_count:
+            self.stdout.write(
+                f"Abandoned {abandoned_count} older unfinished scrape run(s) "
+                f"for {shelter.name}"
+            )
 
-            kitties, errors = scrape_shelter(shelter)
+        stats = ScrapeStats()
+        items = iter_scrape_shelter(
+            shelter,
+            concurrency=options["concurrency"],
+            known_kitties=known_kitties,
+            request_policy=RequestPolicy()
+            if options["no_block_resources"]
+            else RequestPolicy.from_settings(),
+            stats=stats,
+            engine=options["engine"],
+            cache=options["cache"],
+            archive=options["archive"],
+            skip_links=skip_links,
+            scrape_loop=scrape_loop,
+        )
+
+        writer = ScrapeRunWriter(scrape_run)
+        with stats.phase("scrape"):
+            writer.write_all(items)
+        with stats.phase("complete"):
+            writer.complete()
+        self.save_stats(scrape_run, stats)
 
-            if errors:
+        if scrape_run.errors:
+            error_counts = Counter(error["code"] for error in scrape_run.errors)
+            self.stdout.write(
+                self.style.WARNING(f"Errors for {shelter.name}: {dict(error_counts)}")
+            )
+        if scrape_run.status == "completed":
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Successfully scraped {shelter.name}: "
+                    f"{scrape_run.kitties_found} kitties found"
+                )
+            )
+            summary = dict(scrape_run.stats)
+            phases = summary.pop("phases")
+            self.stdout.write(f"Scrape run {scrape_run.id} completed: {summary}")
+            for name, phase_stats in phases.items():
                 self.stdout.write(
-                    self.style.WARNING(f"Errors for {shelter.name}: {errors}")
+                    f"  {name:<16} {phase_stats['count']:>5} x "
+                    f"{phase_stats['mean_seconds']:.3f}s mean, "
+                    f"{phase_stats['max_seconds']:.3f}s max, "
+                    f"{phase_stats['seconds']:.3f}s total"
                 )
+        else:
             self.stdout.write(
-                self.style.SUCCESS(
-                    f"Successfully scraped {shelter.name}: {len(kitties)} kitties found"
+                self.style.ERROR(
+                    f"Scrape run {scrape_run.id} did not finish after "
+                    f"{scrape_run.kitties_found} kitties, "
+                    "run again with --resume to pick it up"
                 )
             )
-            scrape_run.kitties_found = len(kitties)
-            scrape_run.errors = errors
-            scrape_run.raw_data = kitties
-            scrape_run.status = "completed"
-            scrape_run.save()
-            scrape_runs.append(str(scrape_run.id))
+        return scrape_run
 
-            self.stdout.write(f"Scrape run {scrape_run.id} completed")
+    def save_stats(self, scrape_run, stats: ScrapeStats):
+        """Store the stats summary on the run and log it as one JSON line"""
+        scrape_run.stats = stats.summary()
+        scrape_run.save(update_fields=["stats", "modified"])
+        logger.info(
+            "scrape_run_stats %s",
+            json.dumps(
+                {
+                    "scrape_run": scrape_run.id,
+                    "shelter": scrape_run.shelter.slug,
+                    "status": scrape_run.status,
+                    "kitties_found": scrape_run.kitties_found,
+                    "errors": len(scrape_run.errors or []),
+                    **scrape_run.stats,
+                }
+            ),
+        )
 
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Completed {len(scrape_runs)} scrape run(s) with ids: {', '.join(scrape_runs)}"
-            )
+    def resume(self, scrape_run) -> set[str]:
+        """Prepare an unfinished scrape run to continue where it stopped.
+
+        Errors from the interrupted attempt are cleared, as the kitties they
+        belong to are tried again.
+
+        Returns:
+            The links of the kitties the run already scraped
+        """
+        done_links = set(scrape_run.scraped_kitties.values_list("link", flat=True))
+        scrape_run.kitties_found = len(done_links)
+        scrape_run.errors = []
+        scrape_run.save(update_fields=["kitties_found", "errors", "modified"])
+        self.stdout.write(f"{len(done_links)} kitties already scraped")
+        return done_links
+
+    def known_kitties(self, shelter, full_refresh: bool) -> dict | None:
+        """Return the previous run's kitties keyed by link for an incremental
+        scrape, or None when every detail page should be scraped"""
+        if full_refresh:
+            return None
+
+        last_full_refresh = shelter.latest_completed_scrape_run(full_refresh=True)
+        refresh_due = timezone.now() - timedelta(
+            days=settings.SCRAPER_FULL_REFRESH_DAYS
         )
+        if not last_full_refresh or last_full_refresh.created < refresh_due:
+            self.stdout.write(f"Full refresh due for {shelter.name}")
+            return None
+
+        return run_kitty_data(shelter.latest_completed_scrape_run())
@@ -1,113 +1,199 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.utils import timezone
+from django.db import connection
+from django.db.models import BigIntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from kittyalert.email import (
+    recipient_greeting,
+    render_kitty_notification,
+    unsubscribe_url,
+)
+from kittyalert.models import Notification, ScrapeRun, Shelter, Subscription
+from kittyalert.outbox import notification_payload
 
-from kittyalert.email import format_kitty_notification, send_email_notification
-from kittyalert.models import Notification, ScrapeRun, Subscription
+logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = "Send email notifications for new kitties to all subscribers"
+    help = (
+        "Queue email notifications for new kitties to all subscribers, to be "
+        "sent by deliver_notifications"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.NOTIFICATION_WORKERS,
+            help="Number of shelters to notify subscribers of in parallel",
+        )
 
     def handle(self, *args, **options):
-        """Send email notifications for new kitties to all subscribers of the
-        last scrape run"""
-
-        sent_count = 0
-
-        # Get the latest and previous scrape runs
-        scrape_runs = ScrapeRun.objects.order_by("-created")[:2]
+        """Queue email notifications for new kitties to the subscribers of
+        each shelter's latest completed scrape run"""
+        shelters = list(Shelter.objects.filter(subscriptions__isnull=False).distinct())
 
-        if len(scrape_runs) < 2:
+        if not shelters:
             self.stdout.write(
-                self.style.WARNING("Need at least 2 scrape runs to compare. Skipping.")
+                self.style.WARNING("No subscriptions found. No notifications queued.")
             )
             return
 
-        latest_scrape_run = scrape_runs[0]
-        latest_scrape_run_data = latest_scrape_run.raw_data or []
+        queued_count = 0
+        new_kitty_count = 0
+        workers = max(1, options["workers"])
+        # Each shelter is notified about independently, so a shelter with no
+        # new kitties, or one that fails, does not hold up the others.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.notify_in_worker, shelter): shelter
+                for shelter in shelters
+            }
+            for future in as_completed(futures):
+                shelter = futures[future]
+                try:
+                    shelter_queued_count, shelter_new_kitty_count = future.result()
+                except Exception:
+                    logger.exception("Failed to notify subscribers of %s", shelter)
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f"Failed to notify subscribers of {shelter.name}"
+                        )
+                    )
+                    continue
+                queued_count += shelter_queued_count
+                new_kitty_count += shelter_new_kitty_count
 
-        subscriptions = Subscription.objects.select_related("adopter", "adopter__user")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nNotifications queued: {queued_count} | "
+                f"New kitties: {new_kitty_count}"
+            )
+        )
 
-        if not subscriptions.exists():
+    def notify_in_worker(self, shelter) -> tuple[int, int]:
+        """Notify a shelter's subscribers from a worker thread, releasing its
+        DB connection"""
+        try:
+            return self.notify(shelter)
+        finally:
+            connection.close()
+
+    def notify(self, shelter) -> tuple[int, int]:
+        """Queue notifications to a shelter's subscribers of the kitties its
+        latest completed scrape run found since they were last notified.
+
+        Returns:
+            Tuple of (notifications queued, new kitties in the latest run)
+        """
+        latest_scrape_run = shelter.latest_completed_scrape_run()
+        if not latest_scrape_run:
             self.stdout.write(
-                self.style.WARNING(f"No subscriptions found. No notifications sent.")
+                self.style.WARNING(f"{shelter.name} has no completed scrape runs.")
             )
-            return
+            return 0, 0
 
-        for subscription in subscriptions:
-            last_notification = (
-                Notification.objects.filter(
-                    subscription=subscription,
+        subscriptions = self.subscriptions_to_notify(shelter, latest_scrape_run)
+        if not subscriptions:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{shelter.name}: no subscriptions to notify. "
+                    "No notifications queued."
                 )
-                .order_by("-created")
-                .first()
-            )
-
-            previous_scrape_run = (
-                last_notification.scrape_run
-                if last_notification
-                else ScrapeRun.objects.filter(shelter=subscription.shelter).order_by(
-                    "-created"
-                )[1]
             )
+            return 0, 0
 
-            previous_scrape_run_data = previous_scrape_run.raw_data or []
-            previous_scrape_run_descriptions = {
-                kitty_data["description"] for kitty_data in previous_scrape_run_data
-            }
-
-            new_kitties = [
-                kitty_data
-                for kitty_data in latest_scrape_run_data
-                if kitty_data.get("description", "")
-                not in previous_scrape_run_descriptions
-            ]
-
-            if not new_kitties:
-                self.stdout.write(
-                    self.style.SUCCESS("No new kitties found. No notifications sent.")
-                )
-                return
-
-            subject, message = format_kitty_notification(
-                new_kitties, subscription.shelter.name, subscription.shelter.scrape_url
+        # Subscribers who were last notified about the same run get the same
+        # kitties, so each group's kitties are looked up once.
+        groups = defaultdict(list)
+        for subscription in subscriptions:
+            groups[subscription.previous_scrape_run_id].append(subscription)
+        previous_scrape_runs = ScrapeRun.objects.in_bulk(groups)
+
+        notifications = []
+        new_kitty_count = 0
+        for previous_scrape_run_id, group in groups.items():
+            rendered = render_kitty_notification(
+                latest_scrape_run, previous_scrape_runs[previous_scrape_run_id]
             )
 
-            notification = Notification.objects.create(
-                subscription=subscription,
-                scrape_run=latest_scrape_run,
-            )
-            adopter = subscription.adopter
-            user_email = adopter.user.email
-            if not user_email:
+            if not rendered.kitty_count:
                 self.stdout.write(
-                    self.style.WARNING(
-                        f"Skipping {adopter.user.username} - no email address"
+                    self.style.SUCCESS(
+                        f"{shelter.name}: no new kitties found since scrape run "
+                        f"{previous_scrape_run_id}. No notifications queued."
                     )
                 )
                 continue
 
-            success = send_email_notification(user_email, subject, message)
-            notification.email_sent_at = timezone.now()
-            notification.save()
-            if success:
-                sent_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Sent notification to {adopter.user.username} at {user_email}"
-                    )
+            new_kitty_count = max(new_kitty_count, rendered.kitty_count)
+            for subscription in group:
+                notification = Notification(
+                    subscription=subscription, scrape_run=latest_scrape_run
                 )
-            else:
-                notification.errors = [f"Failed to send email to {user_email}"]
-                notification.save()
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"Failed to send notification to {adopter.user.username} at {user_email}"
+                adopter = subscription.adopter
+                user_email = adopter.user.email
+                if user_email:
+                    message, html_message = rendered.personalize(
+                        recipient_greeting(adopter), unsubscribe_url(adopter, shelter)
                     )
-                )
+                    notification.payload = notification_payload(
+                        user_email, rendered.subject, message, html_message
+                    )
+                else:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"Skipping {adopter.user.username} - no email address"
+                        )
+                    )
+                    notification.status = "failed"
+                    notification.errors = ["No email address"]
+                notifications.append(notification)
 
+        Notification.objects.bulk_create(notifications, batch_size=500)
+        queued_count = sum(
+            notification.status == "pending" for notification in notifications
+        )
         self.stdout.write(
-            self.style.SUCCESS(
-                f"\nNotifications sent: {sent_count} | New kitties: {len(new_kitties)}"
+            self.style.SUCCESS(f"{shelter.name}: queued {queued_count} notification(s)")
+        )
+        return queued_count, new_kitty_count
+
+    def subscriptions_to_notify(self, shelter, latest_scrape_run) -> list[Subscription]:
+        """Load every subscription to a shelter not yet notified about
+        latest_scrape_run in one query, annotated with the run to compare it
+        against.
+
+        That is the run the subscription was last notified about or, for
+        subscriptions never notified, the shelter's completed run before
+        latest_scrape_run. Subscriptions with neither are left out.
+        """
+        last_notified_scrape_run = (
+            Notification.objects.filter(subscription=OuterRef("pk"))
+            .order_by("-created")
+            .values("scrape_run_id")[:1]
+        )
+        previous_completed_scrape_run = (
+            shelter.scrape_runs.filter(
+                status="completed", created__lt=latest_scrape_run.created
+            )
+            .order_by("-created")
+            .values("id")[:1]
+        )
+        return list(
+            shelter.subscriptions.select_related("adopter__user")
+            .annotate(
+                previous_scrape_run_id=Coalesce(
+                    Subquery(last_notified_scrape_run),
+                    Subquery(previous_completed_scrape_run),
+                    output_field=BigIntegerField(),
+                )
             )
+            .filter(previous_scrape_run_id__isnull=False)
+            .exclude(previous_scrape_run_id=latest_scrape_run.id)
         )
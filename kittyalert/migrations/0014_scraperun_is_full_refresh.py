@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0013_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraperun',
+            name='is_full_refresh',
+            field=models.BooleanField(db_comment='Whether every detail page was scraped rather than carried forward', default=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0014_scraperun_is_full_refresh'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shelter',
+            name='scrape_engine',
+            field=models.TextField(choices=[('playwright', 'Playwright'), ('http', 'HTTP')], db_comment='How the shelter is scraped: a headless browser, or plain HTTP requests falling back to the browser for pages that need it', default='playwright'),
+        ),
+    ]
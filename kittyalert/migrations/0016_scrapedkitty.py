@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:34
+
+import django.db.models.deletion
+import django_extensions.db.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0015_shelter_scrape_engine'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapedKitty',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('position', models.PositiveIntegerField(db_comment="The position of the kitty on the shelter's listing")),
+                ('link', models.URLField(db_comment="The URL of the kitty's page on the shelter's website", max_length=2048)),
+                ('data', models.JSONField(db_comment='The kitty data as scraped')),
+                ('scrape_run', models.ForeignKey(db_comment='The scrape run that found this kitty', on_delete=django.db.models.deletion.CASCADE, related_name='scraped_kitties', to='kittyalert.scraperun')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scrape_run', 'position'], name='kittyalert__scrape__8ce8f7_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scrape_run', 'link'), name='unique_scraped_kitty_by_scrape_run_and_link')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0016_scrapedkitty'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shelter',
+            name='scrape_max_concurrency',
+            field=models.PositiveIntegerField(blank=True, db_comment="Most pages the scraper may fetch from the shelter's site at once. Empty uses the SCRAPER_MAX_CONCURRENCY setting.", null=True),
+        ),
+        migrations.AddField(
+            model_name='shelter',
+            name='scrape_requests_per_second',
+            field=models.FloatField(blank=True, db_comment="Requests per second the scraper may send to the shelter's site, or 0 for no limit. Empty uses the SCRAPER_REQUESTS_PER_SECOND setting.", null=True),
+        ),
+        migrations.AddField(
+            model_name='shelter',
+            name='scrape_target_latency',
+            field=models.FloatField(blank=True, db_comment='Page load time in seconds above which the scraper stops raising its concurrency. Empty uses the SCRAPER_TARGET_LATENCY setting.', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0017_shelter_scrape_max_concurrency_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraperun',
+            name='stats',
+            field=models.JSONField(blank=True, db_comment='Per-phase timings, page counts, bytes, retries and timeouts of the scrape', null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0018_scraperun_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scrapedkitty',
+            name='kitty',
+            field=models.ForeignKey(db_comment='The kitty that was found', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='observations', to='kittyalert.kitty'),
+        ),
+    ]
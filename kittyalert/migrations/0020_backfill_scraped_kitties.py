@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:42
+
+from django.db import migrations
+
+KITTY_FIELDS = (
+    "link",
+    "name",
+    "age",
+    "weight",
+    "gender",
+    "breed",
+    "color",
+    "description",
+    "image_urls",
+    "location",
+)
+
+
+def backfill_scraped_kitties(apps, schema_editor):
+    """Link every scraped kitty to a Kitty, creating scraped kitties from
+    raw_data for runs from before they were written."""
+    Kitty = apps.get_model("kittyalert", "Kitty")
+    ScrapeRun = apps.get_model("kittyalert", "ScrapeRun")
+    ScrapedKitty = apps.get_model("kittyalert", "ScrapedKitty")
+
+    for scrape_run in ScrapeRun.objects.only("id", "shelter_id", "raw_data").iterator():
+        scraped_kitties = list(ScrapedKitty.objects.filter(scrape_run_id=scrape_run.id))
+        is_new = not scraped_kitties
+        if is_new:
+            scraped_kitties = [
+                ScrapedKitty(
+                    scrape_run_id=scrape_run.id,
+                    position=position,
+                    link=data.get("link") or "",
+                    data=data,
+                )
+                for position, data in enumerate(scrape_run.raw_data or [])
+            ]
+        if not scraped_kitties:
+            continue
+
+        kitties = {}
+        for scraped_kitty in scraped_kitties:
+            data = {field: scraped_kitty.data.get(field) for field in KITTY_FIELDS}
+            data["description"] = data["description"] or ""
+            for field in KITTY_FIELDS:
+                if field not in ("description", "image_urls"):
+                    data[field] = data[field] or ""
+            kitties[data["description"]] = Kitty(shelter_id=scrape_run.shelter_id, **data)
+
+        Kitty.objects.bulk_create(
+            list(kitties.values()),
+            update_conflicts=True,
+            unique_fields=["shelter", "description"],
+            update_fields=[field for field in KITTY_FIELDS if field != "description"],
+        )
+        for scraped_kitty in scraped_kitties:
+            scraped_kitty.kitty = kitties[scraped_kitty.data.get("description") or ""]
+
+        if is_new:
+            ScrapedKitty.objects.bulk_create(scraped_kitties, ignore_conflicts=True)
+        else:
+            ScrapedKitty.objects.bulk_update(scraped_kitties, ["kitty"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0019_scrapedkitty_kitty'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_scraped_kitties, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0020_backfill_scraped_kitties'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='scrapedkitty',
+            name='data',
+        ),
+        migrations.AlterField(
+            model_name='scrapedkitty',
+            name='kitty',
+            field=models.ForeignKey(db_comment='The kitty that was found', on_delete=django.db.models.deletion.CASCADE, related_name='observations', to='kittyalert.kitty'),
+        ),
+        migrations.AddIndex(
+            model_name='scrapedkitty',
+            index=models.Index(fields=['scrape_run', 'kitty'], name='kittyalert__scrape__cc3e52_idx'),
+        ),
+    ]
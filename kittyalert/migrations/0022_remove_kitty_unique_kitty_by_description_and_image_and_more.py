@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0021_remove_scrapedkitty_data_alter_scrapedkitty_kitty_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='kitty',
+            name='unique_kitty_by_description_and_image',
+        ),
+        migrations.AddField(
+            model_name='kitty',
+            name='identity',
+            field=models.CharField(db_comment="SHA-256 of the kitty's normalized link, or of its description if it has no link, identifying the kitty within its shelter", default='', max_length=64),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:46
+
+import hashlib
+import re
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from django.db import migrations
+
+
+def identity_for(link, description):
+    """Kitty.identity_for as of this migration"""
+    if link and link.strip():
+        parts = urlsplit(link.strip())
+        key = "link:" + parts.path.rstrip("/")
+        if parts.query:
+            key += "?" + parts.query
+    else:
+        key = "description:" + re.sub(r"\s+", " ", description or "").strip()
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def backfill_kitty_identity(apps, schema_editor):
+    """Fill in every kitty's identity, merging kitties that turn out to be the
+    same one, e.g. because its description changed between scrapes."""
+    Kitty = apps.get_model("kittyalert", "Kitty")
+    Adopter = apps.get_model("kittyalert", "Adopter")
+    Shelter = apps.get_model("kittyalert", "Shelter")
+    ScrapedKitty = apps.get_model("kittyalert", "ScrapedKitty")
+    AdopterKitty = Adopter.kitties.through
+    ShelterKitty = Shelter.kitties.through
+
+    kitties_by_identity = defaultdict(list)
+    for kitty in Kitty.objects.only("id", "shelter_id", "link", "description"):
+        kitty.identity = identity_for(kitty.link, kitty.description)
+        kitties_by_identity[(kitty.shelter_id, kitty.identity)].append(kitty)
+
+    survivors = []
+    for kitties in kitties_by_identity.values():
+        # The most recently created kitty has the most recent details.
+        survivor, *duplicates = sorted(kitties, key=lambda kitty: -kitty.id)
+        survivors.append(survivor)
+        if not duplicates:
+            continue
+
+        duplicate_ids = [kitty.id for kitty in duplicates]
+        ScrapedKitty.objects.filter(kitty_id__in=duplicate_ids).update(
+            kitty_id=survivor.id
+        )
+        AdopterKitty.objects.bulk_create(
+            [
+                AdopterKitty(adopter_id=adopter_id, kitty_id=survivor.id)
+                for adopter_id in AdopterKitty.objects.filter(
+                    kitty_id__in=duplicate_ids
+                ).values_list("adopter_id", flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+        ShelterKitty.objects.bulk_create(
+            [
+                ShelterKitty(shelter_id=shelter_id, kitty_id=survivor.id)
+                for shelter_id in ShelterKitty.objects.filter(
+                    kitty_id__in=duplicate_ids
+                ).values_list("shelter_id", flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+        Kitty.objects.filter(id__in=duplicate_ids).delete()
+
+    Kitty.objects.bulk_update(survivors, ["identity"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0022_remove_kitty_unique_kitty_by_description_and_image_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_kitty_identity, migrations.RunPython.noop),
+    ]
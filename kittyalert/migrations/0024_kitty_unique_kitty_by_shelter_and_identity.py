@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0023_backfill_kitty_identity'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='kitty',
+            constraint=models.UniqueConstraint(fields=('shelter', 'identity'), name='unique_kitty_by_shelter_and_identity'),
+        ),
+    ]
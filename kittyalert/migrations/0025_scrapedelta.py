@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:46
+
+import django.db.models.deletion
+import django_extensions.db.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0024_kitty_unique_kitty_by_shelter_and_identity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', django_extensions.db.fields.CreationDateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', django_extensions.db.fields.ModificationDateTimeField(auto_now=True, verbose_name='modified')),
+                ('added_kitties', models.ManyToManyField(related_name='added_in_deltas', to='kittyalert.kitty')),
+                ('previous_scrape_run', models.ForeignKey(blank=True, db_comment="The scrape run compared against, or null for a shelter's first run", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='kittyalert.scraperun')),
+                ('removed_kitties', models.ManyToManyField(related_name='removed_in_deltas', to='kittyalert.kitty')),
+                ('scrape_run', models.OneToOneField(db_comment='The completed scrape run the changes were found by', on_delete=django.db.models.deletion.CASCADE, related_name='delta', to='kittyalert.scraperun')),
+            ],
+            options={
+                'get_latest_by': 'modified',
+                'abstract': False,
+            },
+        ),
+    ]
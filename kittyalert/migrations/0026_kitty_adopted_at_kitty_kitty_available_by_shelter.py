@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0025_scrapedelta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kitty',
+            name='adopted_at',
+            field=models.DateTimeField(blank=True, db_comment="When the kitty disappeared from the shelter's listing", null=True),
+        ),
+        migrations.AddIndex(
+            model_name='kitty',
+            index=models.Index(condition=models.Q(('is_adopted', False)), fields=['shelter'], name='kitty_available_by_shelter'),
+        ),
+    ]
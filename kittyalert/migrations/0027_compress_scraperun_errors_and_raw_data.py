@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:05
+
+import kittyalert.fields
+from django.db import migrations, models
+
+
+def compress(apps, schema_editor):
+    """Copy every run's errors and raw_data into the compressed columns"""
+    ScrapeRun = apps.get_model("kittyalert", "ScrapeRun")
+
+    batch = []
+    for scrape_run in ScrapeRun.objects.only("id", "errors_json", "raw_data_json").iterator():
+        scrape_run.errors = scrape_run.errors_json
+        scrape_run.raw_data = scrape_run.raw_data_json
+        batch.append(scrape_run)
+        if len(batch) >= 100:
+            ScrapeRun.objects.bulk_update(batch, ["errors", "raw_data"])
+            batch = []
+    ScrapeRun.objects.bulk_update(batch, ["errors", "raw_data"])
+
+
+def decompress(apps, schema_editor):
+    ScrapeRun = apps.get_model("kittyalert", "ScrapeRun")
+
+    batch = []
+    for scrape_run in ScrapeRun.objects.only("id", "errors", "raw_data").iterator():
+        scrape_run.errors_json = scrape_run.errors
+        scrape_run.raw_data_json = scrape_run.raw_data
+        batch.append(scrape_run)
+        if len(batch) >= 100:
+            ScrapeRun.objects.bulk_update(batch, ["errors_json", "raw_data_json"])
+            batch = []
+    ScrapeRun.objects.bulk_update(batch, ["errors_json", "raw_data_json"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0026_kitty_adopted_at_kitty_kitty_available_by_shelter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraperun',
+            name='is_compacted',
+            field=models.BooleanField(db_comment="Whether the run's raw data and scraped kitties were removed, keeping only its counts, error summary and delta", default=False),
+        ),
+        migrations.RenameField(
+            model_name='scraperun',
+            old_name='errors',
+            new_name='errors_json',
+        ),
+        migrations.RenameField(
+            model_name='scraperun',
+            old_name='raw_data',
+            new_name='raw_data_json',
+        ),
+        migrations.AddField(
+            model_name='scraperun',
+            name='errors',
+            field=kittyalert.fields.CompressedJSONField(blank=True, db_comment='Errors encountered during the scrape, as gzipped JSON', null=True),
+        ),
+        migrations.AddField(
+            model_name='scraperun',
+            name='raw_data',
+            field=kittyalert.fields.CompressedJSONField(blank=True, db_comment='Raw scraped data stored as gzipped JSON for debugging purposes', help_text='Raw scraped data for debugging', null=True),
+        ),
+        migrations.RunPython(compress, decompress),
+        migrations.RemoveField(
+            model_name='scraperun',
+            name='errors_json',
+        ),
+        migrations.RemoveField(
+            model_name='scraperun',
+            name='raw_data_json',
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:54
+
+from django.db import migrations, models
+
+
+def mark_existing_notifications(apps, schema_editor):
+    """Notifications from before the outbox were sent, or failed, inline"""
+    Notification = apps.get_model("kittyalert", "Notification")
+    Notification.objects.filter(email_sent_at__isnull=False, errors__isnull=True).update(
+        status="sent"
+    )
+    Notification.objects.exclude(status="sent").update(status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0027_compress_scraperun_errors_and_raw_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='attempts',
+            field=models.IntegerField(db_comment='Number of times delivery has been attempted', default=0),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='claimed_by',
+            field=models.CharField(blank=True, db_comment='Token of the delivery worker sending the notification', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, db_comment="When the delivery worker's claim expires, so another worker may retry the notification if the first one died", null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, db_comment='Earliest time delivery may be retried, or null for right away', null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='payload',
+            field=models.JSONField(blank=True, db_comment='The rendered email to deliver: recipient, subject and body', null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='status',
+            field=models.TextField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], db_comment="Delivery state of the notification's email", default='pending'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='kittyalert__status_76f8ab_idx'),
+        ),
+        migrations.RunPython(mark_existing_notifications, migrations.RunPython.noop),
+    ]
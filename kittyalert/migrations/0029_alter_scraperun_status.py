@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kittyalert', '0028_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scraperun',
+            name='status',
+            field=models.TextField(choices=[('waiting', 'Waiting'), ('running', 'Running'), ('completed', 'Completed'), ('abandoned', 'Abandoned')], db_comment='Current status of the scrape operation', default='waiting'),
+        ),
+    ]
@@ -1,10 +1,16 @@
 """Models for the 😻 Kitty Alert app"""
 
+import hashlib
+import re
+from urllib.parse import urlsplit
+
 from django.contrib.auth import get_user_model
 from django.db import models
 from django_extensions.db.fields import AutoSlugField
 from django_extensions.db.models import TimeStampedModel
 
+from .fields import CompressedJSONField
+
 User = get_user_model()
 
 
@@ -24,6 +30,70 @@ class Shelter(TimeStampedModel):
         "Kitty",
         related_name="shelters",
     )
+    scrape_engine = models.TextField(
+        choices=[
+            ("playwright", "Playwright"),
+            ("http", "HTTP"),
+        ],
+        default="playwright",
+        db_comment="How the shelter is scraped: a headless browser, or plain HTTP "
+        "requests falling back to the browser for pages that need it",
+    )
+    scrape_requests_per_second = models.FloatField(
+        blank=True,
+        null=True,
+        db_comment="Requests per second the scraper may send to the shelter's site, "
+        "or 0 for no limit. Empty uses the SCRAPER_REQUESTS_PER_SECOND setting.",
+    )
+    scrape_max_concurrency = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        db_comment="Most pages the scraper may fetch from the shelter's site at "
+        "once. Empty uses the SCRAPER_MAX_CONCURRENCY setting.",
+    )
+    scrape_target_latency = models.FloatField(
+        blank=True,
+        null=True,
+        db_comment="Page load time in seconds above which the scraper stops "
+        "raising its concurrency. Empty uses the SCRAPER_TARGET_LATENCY setting.",
+    )
+
+    def latest_completed_scrape_run(self, full_refresh: bool = False):
+        """Return the most recent completed scrape run for this shelter.
+
+        Args:
+            full_refresh: Only consider runs that scraped every detail page
+        """
+        scrape_runs = self.scrape_runs.filter(status="completed")
+        if full_refresh:
+            scrape_runs = scrape_runs.filter(is_full_refresh=True)
+        return scrape_runs.order_by("-created").first()
+
+    def latest_unfinished_scrape_run(self):
+        """Return the most recent scrape run for this shelter that never
+        completed, e.g. because the scrape crashed or was interrupted.
+
+        Runs started before the latest completed run are out of date, so they
+        are not returned.
+        """
+        scrape_runs = self.scrape_runs.filter(status="running")
+        latest_completed_scrape_run = self.latest_completed_scrape_run()
+        if latest_completed_scrape_run:
+            scrape_runs = scrape_runs.filter(
+                created__gt=latest_completed_scrape_run.created
+            )
+        return scrape_runs.order_by("-created").first()
+
+    def abandon_unfinished_scrape_runs(self, scrape_run) -> int:
+        """Mark this shelter's unfinished scrape runs started before scrape_run
+        as abandoned, so they are never resumed.
+
+        Returns:
+            The number of scrape runs abandoned
+        """
+        return self.scrape_runs.filter(
+            status="running", created__lt=scrape_run.created
+        ).update(status="abandoned")
 
 
 class Kitty(TimeStampedModel):
@@ -32,14 +102,28 @@ class Kitty(TimeStampedModel):
     class Meta:
         """Meta configuration for the Kitty model"""
 
-        # Add unique constraint for description + image_url
         constraints = [
             models.UniqueConstraint(
-                fields=["shelter", "description"],
-                name="unique_kitty_by_description_and_image",
+                fields=["shelter", "identity"],
+                name="unique_kitty_by_shelter_and_identity",
+            )
+        ]
+        indexes = [
+            # Kitties still up for adoption are a small share of all kitties
+            # ever seen, so index just those.
+            models.Index(
+                fields=["shelter"],
+                condition=models.Q(is_adopted=False),
+                name="kitty_available_by_shelter",
             )
         ]
 
+    identity = models.CharField(
+        max_length=64,
+        db_comment="SHA-256 of the kitty's normalized link, or of its description "
+        "if it has no link, identifying the kitty within its shelter",
+    )
+
     link = models.URLField(
         db_comment="The URL of the kitty's page on the shelter's website"
     )
@@ -60,6 +144,11 @@ class Kitty(TimeStampedModel):
     is_adopted = models.BooleanField(
         default=False, db_comment="Whether the kitty has been adopted"
     )
+    adopted_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        db_comment="When the kitty disappeared from the shelter's listing",
+    )
     image_urls = models.JSONField(
         blank=True, null=True, db_comment="The URLs of the kitty's images"
     )
@@ -67,6 +156,28 @@ class Kitty(TimeStampedModel):
         db_comment="The location of the kitty or whether they are bonded with another kitty"
     )
 
+    @staticmethod
+    def identity_for(link: str | None, description: str | None) -> str:
+        """Return the identity of a kitty with the given link and description.
+
+        The link's path and query identify the kitty, so absolute and
+        relative links to the same page match. Kitties without a link fall
+        back to their description with whitespace collapsed.
+        """
+        if link and link.strip():
+            parts = urlsplit(link.strip())
+            key = "link:" + parts.path.rstrip("/")
+            if parts.query:
+                key += "?" + parts.query
+        else:
+            key = "description:" + re.sub(r"\s+", " ", description or "").strip()
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        if not self.identity:
+            self.identity = Kitty.identity_for(self.link, self.description)
+        super().save(*args, **kwargs)
+
 
 class Adopter(TimeStampedModel):
     """A user who is looking to adopt a kitty."""
@@ -94,6 +205,7 @@ class ScrapeRun(TimeStampedModel):
             ("waiting", "Waiting"),
             ("running", "Running"),
             ("completed", "Completed"),
+            ("abandoned", "Abandoned"),
         ],
         default="waiting",
         db_comment="Current status of the scrape operation",
@@ -101,15 +213,47 @@ class ScrapeRun(TimeStampedModel):
     kitties_found = models.IntegerField(
         default=0, db_comment="Total number of kitties found during the scrape"
     )
-    errors = models.JSONField(
-        blank=True, null=True, db_comment="Errors encountered during the scrape"
+    errors = CompressedJSONField(
+        blank=True,
+        null=True,
+        db_comment="Errors encountered during the scrape, as gzipped JSON",
     )
-    raw_data = models.JSONField(
+    raw_data = CompressedJSONField(
         blank=True,
         null=True,
         help_text="Raw scraped data for debugging",
-        db_comment="Raw scraped data stored as JSON for debugging purposes",
+        db_comment="Raw scraped data stored as gzipped JSON for debugging purposes",
+    )
+    is_compacted = models.BooleanField(
+        default=False,
+        db_comment="Whether the run's raw data and scraped kitties were removed, "
+        "keeping only its counts, error summary and delta",
     )
+    is_full_refresh = models.BooleanField(
+        default=True,
+        db_comment="Whether every detail page was scraped rather than carried forward",
+    )
+    stats = models.JSONField(
+        blank=True,
+        null=True,
+        db_comment="Per-phase timings, page counts, bytes, retries and timeouts of "
+        "the scrape",
+    )
+
+    def kitties_added_since(self, previous_scrape_run):
+        """Return the kitties found by this run but not by previous_scrape_run,
+        in listing order.
+
+        Uses the run's precomputed delta when it was taken against
+        previous_scrape_run, and compares the two runs' kitties otherwise.
+        """
+        kitties = Kitty.objects.filter(observations__scrape_run=self)
+        delta = ScrapeDelta.objects.filter(scrape_run=self).first()
+        if delta and delta.previous_scrape_run_id == previous_scrape_run.id:
+            kitties = kitties.filter(added_in_deltas=delta)
+        else:
+            kitties = kitties.exclude(observations__scrape_run=previous_scrape_run)
+        return kitties.order_by("observations__position")
 
     class Meta:
         """Meta configuration for the ScrapeRun model"""
@@ -119,6 +263,66 @@ class ScrapeRun(TimeStampedModel):
         ]
 
 
+class ScrapedKitty(TimeStampedModel):
+    """A kitty as found on a shelter's listing during a single scrape run"""
+
+    class Meta:
+        """Meta configuration for the ScrapedKitty model"""
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=["scrape_run", "link"],
+                name="unique_scraped_kitty_by_scrape_run_and_link",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["scrape_run", "position"]),
+            models.Index(fields=["scrape_run", "kitty"]),
+        ]
+
+    scrape_run = models.ForeignKey(
+        ScrapeRun,
+        on_delete=models.CASCADE,
+        related_name="scraped_kitties",
+        db_comment="The scrape run that found this kitty",
+    )
+    kitty = models.ForeignKey(
+        Kitty,
+        on_delete=models.CASCADE,
+        related_name="observations",
+        db_comment="The kitty that was found",
+    )
+    position = models.PositiveIntegerField(
+        db_comment="The position of the kitty on the shelter's listing"
+    )
+    link = models.URLField(
+        max_length=2048,
+        db_comment="The URL of the kitty's page on the shelter's website",
+    )
+
+
+class ScrapeDelta(TimeStampedModel):
+    """The kitties that appeared on and disappeared from a shelter's listing
+    since its previous completed scrape run"""
+
+    scrape_run = models.OneToOneField(
+        ScrapeRun,
+        on_delete=models.CASCADE,
+        related_name="delta",
+        db_comment="The completed scrape run the changes were found by",
+    )
+    previous_scrape_run = models.ForeignKey(
+        ScrapeRun,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+        db_comment="The scrape run compared against, or null for a shelter's first run",
+    )
+    added_kitties = models.ManyToManyField(Kitty, related_name="added_in_deltas")
+    removed_kitties = models.ManyToManyField(Kitty, related_name="removed_in_deltas")
+
+
 class Subscription(TimeStampedModel):
     """A subscription to a shelter's kitty alerts"""
 
@@ -144,6 +348,7 @@ class Notification(TimeStampedModel):
 
         indexes = [
             models.Index(fields=["subscription", "-created"]),
+            models.Index(fields=["status", "next_attempt_at"]),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -174,3 +379,48 @@ class Notification(TimeStampedModel):
         null=True,
         db_comment="Errors encountered during the notification",
     )
+    status = models.TextField(
+        choices=[
+            ("pending", "Pending"),
+            ("sending", "Sending"),
+            ("sent", "Sent"),
+            ("failed", "Failed"),
+        ],
+        default="pending",
+        db_comment="Delivery state of the notification's email",
+    )
+    payload = models.JSONField(
+        blank=True,
+        null=True,
+        db_comment="The rendered email to deliver: recipient, subject and body",
+    )
+    attempts = models.IntegerField(
+        default=0, db_comment="Number of times delivery has been attempted"
+    )
+    next_attempt_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        db_comment="Earliest time delivery may be retried, or null for right away",
+    )
+    claimed_by = models.CharField(
+        max_length=32,
+        blank=True,
+        db_comment="Token of the delivery worker sending the notification",
+    )
+    claimed_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        db_comment="When the delivery worker's claim expires, so another worker "
+        "may retry the notification if the first one died",
+    )
+
+
+class RateLimit(TimeStampedModel):
+    """A rate limit shared by every process that sends under its name"""
+
+    name = models.CharField(
+        max_length=100, unique=True, db_comment="The name of the rate limit"
+    )
+    next_slot_at = models.DateTimeField(
+        db_comment="The earliest time the next call under the limit may be made"
+    )
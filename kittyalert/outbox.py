@@ -0,0 +1,308 @@
+"""Outbox delivery of 😻 Kitty Alert notification emails
+
+send_notifications queues each Notification with its rendered email as its
+payload. deliver_notifications workers then claim queued notifications in
+batches and send them. A claim is a single conditional UPDATE, so several
+worker processes can run at once without sending an email twice. A claim
+expires, so the notifications of a worker that died are picked up again.
+Failed emails are retried with backoff until they run out of attempts, and
+the rate emails are sent at is limited across all workers together.
+"""
+
+import contextlib
+import logging
+import time
+import uuid
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .email import build_email_message, is_permanent_email_error, send_email_batch
+from .models import Notification, RateLimit
+from .resilience import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces out calls to `rate` per second across every thread and process
+    using the same name. A rate of 0 or less disables the limit.
+
+    Each call reserves the next free time slot in the named RateLimit row
+    with a conditional UPDATE, retrying if another caller took it first, then
+    sleeps until its slot.
+
+    Args:
+        name: The RateLimit row the limit is kept in
+        rate: Calls allowed per second
+    """
+
+    def __init__(self, name: str, rate: float):
+        self.name = name
+        self.rate = rate
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        interval = timedelta(seconds=1 / self.rate)
+        while True:
+            now = timezone.now()
+            rate_limit, _ = RateLimit.objects.get_or_create(
+                name=self.name, defaults={"next_slot_at": now}
+            )
+            slot = max(now, rate_limit.next_slot_at)
+            if RateLimit.objects.filter(
+                pk=rate_limit.pk, next_slot_at=rate_limit.next_slot_at
+            ).update(next_slot_at=slot + interval):
+                break
+        wait = (slot - timezone.now()).total_seconds()
+        if wait > 0:
+            time.sleep(wait)
+
+
+@dataclass
+class DeliveryResult:
+    """How many claimed notifications were sent, queued to retry or failed"""
+
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+
+def notification_payload(
+    to_email: str, subject: str, body: str, html: str | None = None
+) -> dict[str, str | None]:
+    """The rendered email stored on a queued Notification"""
+    return {"to": to_email, "subject": subject, "body": body, "html": html}
+
+
+def claimable_notifications(now, max_attempts: int):
+    """Notifications due to be sent, including those whose claim expired with
+    attempts left"""
+    return Notification.objects.filter(
+        Q(status="pending")
+        & (Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+        | Q(status="sending", claimed_until__lt=now, attempts__lt=max_attempts)
+    )
+
+
+def fail_abandoned_notifications(now, max_attempts: int) -> int:
+    """Mark notifications failed whose claim expired on their last attempt,
+    e.g. because sending them crashed the worker every time.
+
+    Returns:
+        The number of notifications marked failed
+    """
+    failed = Notification.objects.filter(
+        status="sending", claimed_until__lt=now, attempts__gte=max_attempts
+    ).update(status="failed", claimed_by="", claimed_until=None)
+    if failed:
+        logger.warning(
+            "Marked %d notifications failed after %d attempts that never finished",
+            failed,
+            max_attempts,
+        )
+    return failed
+
+
+def claim_notifications(
+    limit: int, claim_timeout: int, max_attempts: int
+) -> list[Notification]:
+    """Claim up to `limit` due notifications for this worker.
+
+    The claim re-checks that each notification is still claimable as it
+    updates it, so a notification another worker claimed first is skipped.
+    Where the database supports it, rows locked by another worker are
+    skipped before that, too. Notifications whose claim expired on their last
+    attempt are marked failed instead of being claimed again.
+
+    Args:
+        limit: Most notifications to claim
+        claim_timeout: Seconds until the claim expires
+        max_attempts: Attempts after which a notification is not claimed again
+
+    Returns:
+        The claimed notifications, oldest first
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    fail_abandoned_notifications(now, max_attempts)
+    candidates = claimable_notifications(now, max_attempts).order_by("created")
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    # Without row locks, e.g. on SQLite, reading before writing in one
+    # transaction only makes concurrent claims fail to upgrade their lock, and
+    # the conditional update is enough on its own.
+    with transaction.atomic() if skip_locked else contextlib.nullcontext():
+        if skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        candidate_ids = list(candidates.values_list("id", flat=True)[:limit])
+        claimable_notifications(now, max_attempts).filter(id__in=candidate_ids).update(
+            status="sending",
+            claimed_by=token,
+            claimed_until=now + timedelta(seconds=claim_timeout),
+            attempts=F("attempts") + 1,
+        )
+    return list(
+        Notification.objects.filter(claimed_by=token, status="sending").order_by(
+            "created"
+        )
+    )
+
+
+def send_claimed(
+    notifications: list[Notification], rate_limiter: RateLimiter
+) -> list[Exception | None]:
+    """Send claimed notifications over one mail server connection.
+
+    The database is only used for the rate limit.
+
+    Returns:
+        For each notification, None if it was sent, or else the error
+    """
+    errors = [None] * len(notifications)
+    messages = []
+    for index, notification in enumerate(notifications):
+        try:
+            messages.append(
+                (
+                    index,
+                    build_email_message(
+                        notification.payload["to"],
+                        notification.payload["subject"],
+                        notification.payload["body"],
+                        notification.payload.get("html"),
+                    ),
+                )
+            )
+        except Exception as e:
+            errors[index] = e
+    sent_errors = send_email_batch(
+        [message for _, message in messages], throttle=rate_limiter.acquire
+    )
+    for (index, _), error in zip(messages, sent_errors, strict=True):
+        errors[index] = error
+    return errors
+
+
+def send_claimed_in_worker(
+    notifications: list[Notification], rate_limiter: RateLimiter
+) -> list[Exception | None]:
+    """Send claimed notifications from a worker thread, releasing the DB
+    connection the rate limiter used"""
+    try:
+        return send_claimed(notifications, rate_limiter)
+    finally:
+        connection.close()
+
+
+def deliver_claimed(
+    notifications: list[Notification],
+    executor: Executor,
+    rate_limiter: RateLimiter,
+    batch_size: int,
+    retry_policy: RetryPolicy,
+) -> DeliveryResult:
+    """Send claimed notifications, `batch_size` per connection, on the
+    executor's threads and record how each went.
+
+    Sent notifications are marked sent. Failed ones are queued again after a
+    backoff delay, or marked failed if the error is permanent or they have
+    run out of attempts. Outcomes are only written for notifications still
+    claimed by this worker, so a worker whose claim expired never overwrites
+    another worker's claim on them.
+
+    Args:
+        notifications: Notifications claimed together by claim_notifications
+    """
+    if not notifications:
+        return DeliveryResult()
+    claim_token = notifications[0].claimed_by
+    result = DeliveryResult()
+    deliverable = []
+    for notification in notifications:
+        if notification.payload:
+            deliverable.append(notification)
+        else:
+            notification.status = "failed"
+            notification.errors = [*(notification.errors or []), "No email to send"]
+            result.failed += 1
+
+    batches = [
+        deliverable[start : start + batch_size]
+        for start in range(0, len(deliverable), batch_size)
+    ]
+    errors = [
+        error
+        for batch_errors in executor.map(
+            lambda batch: send_claimed_in_worker(batch, rate_limiter), batches
+        )
+        for error in batch_errors
+    ]
+
+    now = timezone.now()
+    for notification, error in zip(deliverable, errors, strict=True):
+        if error is None:
+            notification.status = "sent"
+            notification.email_sent_at = now
+            result.sent += 1
+            continue
+
+        notification.errors = [
+            *(notification.errors or []),
+            f"Error sending email to {notification.payload['to']}: {error}",
+        ]
+        if (
+            is_permanent_email_error(error)
+            or notification.attempts >= retry_policy.attempts
+        ):
+            notification.status = "failed"
+            result.failed += 1
+        else:
+            notification.status = "pending"
+            notification.next_attempt_at = now + timedelta(
+                seconds=retry_policy.delay(error, notification.attempts)
+            )
+            result.retried += 1
+
+    for notification in notifications:
+        notification.claimed_by = ""
+        notification.claimed_until = None
+    updated = Notification.objects.filter(claimed_by=claim_token).bulk_update(
+        notifications,
+        [
+            "status",
+            "email_sent_at",
+            "errors",
+            "next_attempt_at",
+            "claimed_by",
+            "claimed_until",
+        ],
+    )
+    if updated < len(notifications):
+        logger.warning(
+            "%d of %d notifications were reclaimed by another worker before "
+            "their outcome was recorded",
+            len(notifications) - updated,
+            len(notifications),
+        )
+    logger.info(
+        "Delivered %d notifications: %d sent, %d to retry, %d failed",
+        len(notifications),
+        result.sent,
+        result.retried,
+        result.failed,
+    )
+    return result
+
+
+def retry_policy_from_settings() -> RetryPolicy:
+    return RetryPolicy(
+        attempts=settings.NOTIFICATION_MAX_ATTEMPTS,
+        base_delay=settings.NOTIFICATION_RETRY_BASE_DELAY,
+        max_delay=settings.NOTIFICATION_RETRY_MAX_DELAY,
+    )
@@ -0,0 +1,127 @@
+"""Record and replay shelter pages for the 😻 Kitty Alert scraper
+
+A PageArchive is a directory with one gzipped JSON file per URL holding the
+response status, headers and body. In record mode every response the scraper
+receives is written to it, redirects included; in replay mode responses are
+served from it instead of the network, so extraction can be re-run offline,
+benchmarked reproducibly and tested without network access.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# The stored body is already decoded, so these no longer describe it.
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class PageArchive:
+    """Directory of recorded responses keyed by URL.
+
+    Args:
+        directory: Where the archive files are stored
+        mode: "record" to write responses to the archive, or "replay" to
+            serve them from it
+    """
+
+    def __init__(self, directory: str | Path, mode: str):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.directory = Path(directory)
+        self.mode = mode
+        if mode == "record":
+            self.directory.mkdir(parents=True, exist_ok=True)
+        elif not self.directory.is_dir():
+            raise FileNotFoundError(f"No page archive at {self.directory}")
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json.gz"
+
+    def save(self, url: str, status: int, headers: dict[str, str], body: bytes):
+        """Write a response to the archive, replacing any earlier one"""
+        record = {
+            "url": url,
+            "status": status,
+            "headers": {
+                name: value
+                for name, value in headers.items()
+                if name.lower() not in SKIPPED_HEADERS
+            },
+            "body": base64.b64encode(body).decode(),
+        }
+        with gzip.open(self._path(url), "wt", encoding="utf-8") as archive_file:
+            json.dump(record, archive_file)
+
+    def load(self, url: str) -> tuple[int, dict[str, str], bytes] | None:
+        """Read a response from the archive.
+
+        Returns:
+            Tuple of (status, headers, body), or None if url was not recorded
+        """
+        try:
+            with gzip.open(self._path(url), "rt", encoding="utf-8") as archive_file:
+                record = json.load(archive_file)
+        except FileNotFoundError:
+            return None
+        return record["status"], record["headers"], base64.b64decode(record["body"])
+
+    async def install(self, context):
+        """Record or replay every response of a Playwright browser context"""
+        if self.mode == "record":
+            context.on("response", self._record_playwright_response)
+        else:
+            await context.route("**/*", self._replay_playwright_route)
+
+    async def _record_playwright_response(self, response):
+        if 300 <= response.status < 400:
+            # Redirects have no body, but replaying their Location header lets
+            # the browser follow them to the recorded target.
+            self.save(response.url, response.status, await response.all_headers(), b"")
+            return
+        try:
+            body = await response.body()
+        except Exception:  # The page navigated away before the body arrived
+            logger.debug("Could not record %s", response.url, exc_info=True)
+            return
+        self.save(response.url, response.status, await response.all_headers(), body)
+
+    async def _replay_playwright_route(self, route):
+        recorded = self.load(route.request.url)
+        if recorded is None:
+            logger.warning("Not in the page archive: %s", route.request.url)
+            await route.fulfill(status=404, body="")
+            return
+        status, headers, body = recorded
+        await route.fulfill(status=status, headers=headers, body=body)
+
+    def httpx_options(self) -> dict:
+        """Keyword arguments for httpx.AsyncClient to record or replay with"""
+        if self.mode == "record":
+            return {"event_hooks": {"response": [self._record_httpx_response]}}
+        return {"transport": httpx.MockTransport(self._replay_httpx_request)}
+
+    async def _record_httpx_response(self, response: httpx.Response):
+        # Redirects are recorded with their Location header like any other
+        # response, and followed again by the client on replay.
+        await response.aread()
+        self.save(
+            str(response.request.url),
+            response.status_code,
+            dict(response.headers),
+            response.content,
+        )
+
+    def _replay_httpx_request(self, request: httpx.Request) -> httpx.Response:
+        recorded = self.load(str(request.url))
+        if recorded is None:
+            logger.warning("Not in the page archive: %s", request.url)
+            return httpx.Response(404, request=request)
+        status, headers, body = recorded
+        return httpx.Response(status, headers=headers, content=body, request=request)
@@ -0,0 +1,265 @@
+"""Persistence stage of the 😻 Kitty Alert scrape pipeline
+
+Kitties are written to the database in batches while the scrape is still
+running, so a crash late in a run keeps everything scraped so far. Each
+scraped kitty is upserted as a Kitty and recorded against the run as a
+ScrapedKitty, so readers query a run's kitties rather than a raw_data blob,
+which is no longer written.
+"""
+
+import logging
+from collections.abc import Iterable
+from typing import Any
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Kitty, ScrapeDelta, ScrapedKitty, ScrapeRun
+from .scraper import ScrapedItem
+
+logger = logging.getLogger(__name__)
+
+KITTY_FIELDS = (
+    "link",
+    "name",
+    "age",
+    "weight",
+    "gender",
+    "breed",
+    "color",
+    "description",
+    "image_urls",
+    "location",
+)
+"""The Kitty fields filled in from scraped kitty data"""
+
+
+def kitty_from_data(shelter, kitty_data: dict[str, Any]) -> Kitty:
+    """Build an unsaved Kitty from the data the scraper extracted"""
+    kitty = Kitty(
+        shelter=shelter, **{field: kitty_data[field] for field in KITTY_FIELDS}
+    )
+    kitty.description = kitty.description or ""
+    kitty.identity = Kitty.identity_for(kitty.link, kitty.description)
+    return kitty
+
+
+def kitty_data(kitty: Kitty) -> dict[str, Any]:
+    """The scraper's data for a Kitty, in the form it was extracted in"""
+    return {field: getattr(kitty, field) for field in KITTY_FIELDS}
+
+
+def run_kitty_data(scrape_run: ScrapeRun) -> dict[str, dict[str, Any]]:
+    """Return the data of every kitty a run found, keyed by listing link"""
+    return {
+        scraped_kitty.link: kitty_data(scraped_kitty.kitty)
+        for scraped_kitty in scrape_run.scraped_kitties.select_related("kitty")
+    }
+
+
+def record_delta(scrape_run: ScrapeRun) -> ScrapeDelta:
+    """Work out which kitties a completed run added and removed since the
+    shelter's previous completed run, and store them as the run's delta.
+
+    Kitties whose detail page failed to scrape in this run are not counted
+    as removed.
+    """
+    previous_scrape_run = (
+        scrape_run.shelter.scrape_runs.filter(
+            status="completed", created__lt=scrape_run.created
+        )
+        .order_by("-created")
+        .first()
+    )
+    kitty_ids = scrape_run.scraped_kitties.values("kitty_id")
+    delta, _ = ScrapeDelta.objects.update_or_create(
+        scrape_run=scrape_run,
+        defaults={"previous_scrape_run": previous_scrape_run},
+    )
+
+    if previous_scrape_run:
+        previous_kitty_ids = previous_scrape_run.scraped_kitties.values("kitty_id")
+        failed_links = [
+            error["link"] for error in scrape_run.errors or [] if error.get("link")
+        ]
+        added = Kitty.objects.filter(id__in=kitty_ids).exclude(
+            id__in=previous_kitty_ids
+        )
+        removed = (
+            Kitty.objects.filter(id__in=previous_kitty_ids)
+            .exclude(id__in=kitty_ids)
+            .exclude(
+                observations__scrape_run=previous_scrape_run,
+                observations__link__in=failed_links,
+            )
+        )
+    else:
+        added = Kitty.objects.filter(id__in=kitty_ids)
+        removed = Kitty.objects.none()
+
+    delta.added_kitties.set(added.values_list("id", flat=True))
+    delta.removed_kitties.set(removed.values_list("id", flat=True))
+    logger.info(
+        "Scrape run %s: %d kitties added, %d removed since run %s",
+        scrape_run.pk,
+        delta.added_kitties.count(),
+        delta.removed_kitties.count(),
+        previous_scrape_run.pk if previous_scrape_run else None,
+    )
+    return delta
+
+
+def record_adoptions(delta: ScrapeDelta):
+    """Mark the kitties a delta removed as adopted, and any adopted kitties
+    back on the listing as available again.
+
+    Each is a single UPDATE, however many kitties change. Nothing is recorded
+    for a run that found no kitties or whose listing failed, as its delta
+    would count every kitty as removed.
+    """
+    scrape_run = delta.scrape_run
+    # Errors without a link are failures of the whole scrape, not of a kitty.
+    listing_failed = any(not error.get("link") for error in scrape_run.errors or [])
+    if not scrape_run.kitties_found or listing_failed:
+        logger.warning(
+            "Scrape run %s: not recording adoptions, as it found %d kitties%s",
+            scrape_run.pk,
+            scrape_run.kitties_found,
+            " and its listing failed" if listing_failed else "",
+        )
+        return
+
+    adopted = delta.removed_kitties.filter(is_adopted=False).update(
+        is_adopted=True, adopted_at=timezone.now()
+    )
+    # A kitty may reappear if, e.g., an adoption fell through or the listing
+    # briefly dropped them.
+    returned = Kitty.objects.filter(
+        observations__scrape_run=delta.scrape_run, is_adopted=True
+    ).update(is_adopted=False, adopted_at=None)
+    logger.info(
+        "Scrape run %s: %d kitties adopted, %d back up for adoption",
+        delta.scrape_run_id,
+        adopted,
+        returned,
+    )
+
+
+class ScrapeRunWriter:
+    """Batch-writes scraped kitties for a ScrapeRun as they arrive.
+
+    Every flush also updates the run's kitties_found and errors, so progress
+    is visible while the scrape is running, and the kitties written so far
+    let an interrupted run be resumed.
+
+    Args:
+        scrape_run: The running ScrapeRun to write to
+        batch_size: Number of kitties to write at once
+    """
+
+    def __init__(self, scrape_run: ScrapeRun, batch_size: int | None = None):
+        self.scrape_run = scrape_run
+        self.batch_size = batch_size or settings.SCRAPER_WRITE_BATCH_SIZE
+        self.errors = list(scrape_run.errors or [])
+        self._batch: list[ScrapedItem] = []
+        self._new_errors = False
+        self.failed = False
+
+    def write(self, item: ScrapedItem):
+        """Queue an item, flushing once a full batch is waiting"""
+        if item.error:
+            self.errors.append(item.error)
+            self._new_errors = True
+            if item.position is None:
+                # The scrape failed as a whole, e.g. the listing did not load.
+                self.failed = True
+        else:
+            self._batch.append(item)
+
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, items: Iterable[ScrapedItem]):
+        for item in items:
+            self.write(item)
+        self.flush()
+
+    def flush(self):
+        """Write the queued kitties and record the run's progress"""
+        if not self._batch and not self._new_errors:
+            return
+
+        ScrapedKitty.objects.bulk_create(
+            self._scraped_kitties(),
+            # Ignoring conflicts makes re-writing a kitty for the same run a
+            # no-op.
+            ignore_conflicts=True,
+        )
+        # bulk_create returns the ignored rows too, so the rows actually
+        # written are counted instead.
+        scraped_kitty_count = (
+            ScrapedKitty.objects.filter(scrape_run=OuterRef("pk"))
+            .values("scrape_run")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        ScrapeRun.objects.filter(pk=self.scrape_run.pk).update(
+            kitties_found=Coalesce(Subquery(scraped_kitty_count), 0),
+            errors=self.errors,
+        )
+        self.scrape_run.refresh_from_db(fields=["kitties_found", "errors"])
+        logger.debug(
+            "Scrape run %s: %d kitties written",
+            self.scrape_run.pk,
+            self.scrape_run.kitties_found,
+        )
+        self._batch = []
+        self._new_errors = False
+
+    def _scraped_kitties(self) -> list[ScrapedKitty]:
+        """Upsert the batch's kitties and return the unsaved ScrapedKitty rows"""
+        if not self._batch:
+            return []
+
+        # A statement may only upsert each row once, so kitties sharing an
+        # identity are written as one.
+        identities = []
+        kitties = {}
+        for item in self._batch:
+            kitty = kitty_from_data(self.scrape_run.shelter, item.kitty)
+            identities.append(kitty.identity)
+            kitties[kitty.identity] = kitty
+        Kitty.objects.bulk_create(
+            list(kitties.values()),
+            update_conflicts=True,
+            unique_fields=["shelter", "identity"],
+            update_fields=list(KITTY_FIELDS),
+        )
+
+        return [
+            ScrapedKitty(
+                scrape_run=self.scrape_run,
+                kitty=kitties[identity],
+                position=item.position,
+                link=item.link,
+            )
+            for item, identity in zip(self._batch, identities, strict=True)
+        ]
+
+    def complete(self):
+        """Flush, mark the run completed and record its delta and adoptions.
+
+        A run whose scrape failed as a whole is left running, so it can be
+        resumed. The run's kitties are only kept as ScrapedKitty rows, so
+        completing it never loads the whole listing into memory.
+        """
+        self.flush()
+        if self.failed:
+            logger.warning("Scrape run %s did not finish", self.scrape_run.pk)
+            return
+
+        self.scrape_run.status = "completed"
+        self.scrape_run.save(update_fields=["status", "modified"])
+        record_adoptions(record_delta(self.scrape_run))
@@ -0,0 +1,198 @@
+"""Rate limiting and concurrency tuning for the 😻 Kitty Alert scraper
+
+Requests to each host are spaced out by a token bucket, and the number of
+pages fetched at once is tuned AIMD-style (additive increase, multiplicative
+decrease): concurrency grows by one while pages load quickly and without
+errors, and is halved when the shelter site times out or answers with 429 or
+a 5xx status.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .instrumentation import ConcurrencyChange, ScrapeStats
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottledError(Exception):
+    """A shelter site answered with a status that asks us to slow down"""
+
+    def __init__(self, url: str, status: int, retry_after: str | None = None):
+        super().__init__(f"{url} responded with status {status}")
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+
+def is_throttling_status(status: int) -> bool:
+    return status == httpx.codes.TOO_MANY_REQUESTS or status >= 500
+
+
+def is_throttling_error(error: BaseException) -> bool:
+    """Whether an error means the shelter site is overloaded or limiting us"""
+    if isinstance(error, ThrottledError | PlaywrightTimeoutError):
+        return True
+    if isinstance(error, httpx.TimeoutException):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return is_throttling_status(error.response.status_code)
+    return False
+
+
+def _throttling_reason(error: BaseException) -> str:
+    if isinstance(error, ThrottledError):
+        return f"status {error.status}"
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"status {error.response.status_code}"
+    return "timeout"
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, in bursts of up to
+    `burst`. A rate of 0 or less disables the limit.
+
+    Args:
+        rate: Tokens added per second
+        burst: Maximum number of tokens saved up. Defaults to one second's worth.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+
+        # Waiters queue on the lock, so tokens are handed out in order.
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 1
+                self._updated = time.monotonic()
+            self._tokens -= 1
+
+
+class HostRateLimiter:
+    """A TokenBucket per host, so every site is limited separately.
+
+    Args:
+        rate: Requests per second allowed to each host, or 0 for no limit
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._buckets: dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str):
+        host = urlsplit(url).hostname or ""
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate)
+        await self._buckets[host].acquire()
+
+
+class ConcurrencyController:
+    """Limits how many pages are fetched at once, tuning the limit as it goes.
+
+    After `limit` healthy fetches in a row, the limit grows by one. A fetch
+    is healthy when it succeeds within target_latency seconds; slow fetches
+    and other errors end the streak without changing the limit. A throttling
+    error halves the limit, at most once per round of fetches in flight.
+
+    Args:
+        name: Name to log decisions under, e.g. the shelter's name
+        initial: Number of fetches to allow at first
+        maximum: Highest the limit may grow to
+        target_latency: Fetches slower than this many seconds stop the limit
+            from growing
+        stats: Optional ScrapeStats to record each change into
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        maximum: int,
+        target_latency: float,
+        stats: ScrapeStats | None = None,
+    ):
+        self.name = name
+        self.maximum = max(1, maximum)
+        self.limit = min(max(1, initial), self.maximum)
+        self.target_latency = target_latency
+        self.stats = stats
+        self._active = 0
+        self._healthy_streak = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a free slot and hold it for the duration of one fetch"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_throttling_error(e):
+                self._decrease(started, _throttling_reason(e))
+            else:
+                self._healthy_streak = 0
+            raise
+        else:
+            self._record_success(time.monotonic() - started)
+        finally:
+            async with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def _record_success(self, seconds: float):
+        if seconds > self.target_latency:
+            self._healthy_streak = 0
+            return
+
+        self._healthy_streak += 1
+        if self._healthy_streak >= self.limit and self.limit < self.maximum:
+            self._change(self.limit + 1, f"{self._healthy_streak} healthy fetches")
+
+    def _decrease(self, started: float, reason: str):
+        # Fetches that were already in flight when the limit was last cut saw
+        # the same congestion, so they do not cut it again.
+        if started < self._last_decrease:
+            return
+        self._last_decrease = time.monotonic()
+        if self.limit > 1:
+            self._change(max(1, self.limit // 2), reason)
+        else:
+            self._healthy_streak = 0
+
+    def _change(self, limit: int, reason: str):
+        logger.info(
+            "%s: concurrency %d -> %d (%s)", self.name, self.limit, limit, reason
+        )
+        if self.stats is not None:
+            self.stats.concurrency_changes.append(
+                ConcurrencyChange(self.limit, limit, reason)
+            )
+        # Waiters are woken when the fetch that triggered the change releases
+        # its slot.
+        self.limit = limit
+        self._healthy_streak = 0
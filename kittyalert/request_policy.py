@@ -0,0 +1,89 @@
+"""Request interception for the 😻 Kitty Alert scraper
+
+The scraper only reads the DOM, so images, fonts, media and third-party
+trackers are aborted before they are downloaded.
+"""
+
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _matches_domain(host: str, domains) -> bool:
+    """Whether host is one of domains or a subdomain of one of them"""
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+
+class RequestPolicy:
+    """Decides which requests a scraping page is allowed to make.
+
+    Args:
+        blocked_resource_types: Playwright resource types to abort, e.g. "image"
+        blocked_domains: Domains (and their subdomains) to abort
+        allowed_domains: If not empty, only these domains (and their
+            subdomains) are allowed. Blocked domains still win.
+    """
+
+    def __init__(
+        self,
+        blocked_resource_types=(),
+        blocked_domains=(),
+        allowed_domains=(),
+    ):
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.blocked_domains = tuple(blocked_domains)
+        self.allowed_domains = tuple(allowed_domains)
+
+    @classmethod
+    def from_settings(cls) -> "RequestPolicy":
+        """Build the policy configured by the SCRAPER_* settings"""
+        return cls(
+            blocked_resource_types=settings.SCRAPER_BLOCKED_RESOURCE_TYPES,
+            blocked_domains=settings.SCRAPER_BLOCKED_DOMAINS,
+            allowed_domains=settings.SCRAPER_ALLOWED_DOMAINS,
+        )
+
+    def allows(self, resource_type: str, url: str) -> bool:
+        """Whether a request for url of the given resource type may proceed"""
+        if resource_type in self.blocked_resource_types:
+            return False
+
+        host = urlsplit(url).hostname or ""
+        if _matches_domain(host, self.blocked_domains):
+            return False
+        if self.allowed_domains and not _matches_domain(host, self.allowed_domains):
+            return False
+        return True
+
+    async def install(self, page, meter=None):
+        """Route every request made by page through this policy.
+
+        Args:
+            page: A Playwright page
+            meter: Optional PageMeter counting the blocked requests
+        """
+        if not self.blocked_resource_types and not (
+            self.blocked_domains or self.allowed_domains
+        ):
+            return
+
+        async def handle(route):
+            request = route.request
+            # Top-level navigations are always allowed so the policy can never
+            # block the page being scraped itself.
+            is_page_navigation = (
+                request.is_navigation_request() and request.frame.parent_frame is None
+            )
+            if is_page_navigation or self.allows(request.resource_type, request.url):
+                await route.fallback()
+                return
+
+            if meter:
+                meter.blocked_requests += 1
+            logger.debug("Blocked %s request to %s", request.resource_type, request.url)
+            await route.abort("blockedbyclient")
+
+        await page.route("**/*", handle)
@@ -0,0 +1,168 @@
+"""Retries, circuit breaking and error codes for the 😻 Kitty Alert scraper
+
+Failures are classified as transient (timeouts, dropped connections, 429 and
+5xx responses), which are retried with jittered exponential backoff, or
+permanent (missing pages, unexpected markup), which are not. A circuit
+breaker trips after repeated transient failures so a shelter whose site is
+down is given up on quickly. Errors are stored as compact codes rather than
+tracebacks.
+"""
+
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from django.conf import settings
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .extraction import ExtractionError
+from .rate_limit import ThrottledError, is_throttling_error
+
+logger = logging.getLogger(__name__)
+
+
+class PageStatusError(Exception):
+    """A shelter page answered with an error status that is not worth retrying"""
+
+    def __init__(self, url: str, status: int):
+        super().__init__(f"{url} responded with status {status}")
+        self.url = url
+        self.status = status
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of fetching once a shelter's circuit breaker has tripped"""
+
+
+def error_code(error: BaseException) -> str:
+    """A short, stable code describing an error, for storing and counting"""
+    if isinstance(error, ThrottledError | PageStatusError):
+        return f"http_{error.status}"
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http_{error.response.status_code}"
+    if isinstance(error, PlaywrightTimeoutError | httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.TransportError):
+        return "connection"
+    if isinstance(error, PlaywrightError) and "net::ERR_" in error.message:
+        return "connection"
+    if isinstance(error, ExtractionError):
+        return "extraction"
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    return type(error).__name__
+
+
+def error_record(error: BaseException, link: str | None = None) -> dict[str, Any]:
+    """The compact form of an error stored in ScrapeRun.errors"""
+    message = str(error).strip().splitlines()
+    return {
+        "code": error_code(error),
+        "link": link,
+        "message": message[0][:200] if message else "",
+    }
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether a fetch that failed with error may succeed if tried again"""
+    return error_code(error) == "connection" or is_throttling_error(error)
+
+
+def _retry_after(error: BaseException) -> float | None:
+    """Seconds the site asked us to wait in a Retry-After header, if any"""
+    if isinstance(error, ThrottledError):
+        value = error.retry_after
+    elif isinstance(error, httpx.HTTPStatusError):
+        value = error.response.headers.get("Retry-After")
+    else:
+        return None
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:  # An HTTP date, which shelter sites do not send in practice
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently transient failures are retried
+
+    Args:
+        attempts: Total number of tries, including the first
+        base_delay: Upper bound in seconds of the wait before the first retry,
+            doubled for each retry after that
+        max_delay: Upper bound in seconds of any wait
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            attempts=settings.SCRAPER_RETRY_ATTEMPTS,
+            base_delay=settings.SCRAPER_RETRY_BASE_DELAY,
+            max_delay=settings.SCRAPER_RETRY_MAX_DELAY,
+        )
+
+    def should_retry(self, error: BaseException, attempt: int) -> bool:
+        return attempt < self.attempts and is_transient_error(error)
+
+    def delay(self, error: BaseException, attempt: int) -> float:
+        """Seconds to wait after the given failed attempt, counting from 1.
+
+        Uses "full jitter" so fetches that failed together do not retry
+        together, but never waits less than a Retry-After header asks for.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Trips after `threshold` transient failures in a row.
+
+    A success resets the count. Once tripped it stays open for the rest of
+    the scrape, so the remaining pages fail fast instead of each waiting out
+    its own timeouts and retries.
+
+    Args:
+        name: Name to log under, e.g. the shelter's name
+        threshold: Consecutive transient failures that trip the breaker
+    """
+
+    def __init__(self, name: str, threshold: int):
+        self.name = name
+        self.threshold = threshold
+        self.failures = 0
+        self.is_open = False
+
+    def check(self):
+        """Raise CircuitOpenError if the breaker has tripped"""
+        if self.is_open:
+            raise CircuitOpenError(
+                f"Gave up on {self.name} after {self.failures} failures in a row"
+            )
+
+    def record_success(self):
+        self.failures = 0
+
+    def record_failure(self, error: BaseException):
+        if not is_transient_error(error):
+            return
+        self.failures += 1
+        if self.failures >= self.threshold and not self.is_open:
+            logger.warning(
+                "%s: circuit breaker tripped after %d failures in a row (%s)",
+                self.name,
+                self.failures,
+                error_code(error),
+            )
+            self.is_open = True
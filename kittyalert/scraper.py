@@ -1,149 +1,656 @@
 """Scraper for the 😻 Kitty Alert app"""
 
+import asyncio
+import concurrent.futures
 import logging
-import traceback
-from typing import Any
+import queue
+import threading
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import AsyncExitStack, ExitStack, aclosing, asynccontextmanager
+from typing import Any, NamedTuple
+from urllib.parse import urljoin
 
-import tqdm
-from playwright.sync_api import sync_playwright
+from django.conf import settings
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from tqdm.asyncio import tqdm
+
+from .browser_pool import BrowserPool
+from .extraction import (
+    DESCRIPTION_SELECTOR,
+    LISTING_SELECTOR,
+    ExtractionError,
+    extract_detail,
+    extract_listing,
+)
+from .http_cache import ResponseCache
+from .http_engine import HttpEngine
+from .instrumentation import PageMeter, ScrapeStats, phase
+from .page_archive import PageArchive
+from .rate_limit import (
+    ConcurrencyController,
+    HostRateLimiter,
+    ThrottledError,
+    is_throttling_status,
+)
+from .request_policy import RequestPolicy
+from .resilience import (
+    CircuitBreaker,
+    PageStatusError,
+    RetryPolicy,
+    error_code,
+    error_record,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def scrape_shelter(shelter) -> tuple[list[dict[str, Any]], list]:
+class ScrapedItem(NamedTuple):
+    """The outcome of scraping one kitty on a shelter's listing"""
+
+    position: int | None
+    """Position on the listing, or None for a failure of the whole scrape"""
+    link: str | None
+    kitty: dict[str, Any] | None
+    error: dict[str, Any] | None
+    """An error_record if the kitty could not be scraped"""
+
+
+def scrape_shelter(shelter, **options) -> tuple[list[dict[str, Any]], list]:
     """Scrape the shelter website for kitty data.
 
-    Args:
-        shelter: A Shelter model instance
+    Takes the same arguments as iter_scrape_shelter, but collects everything
+    in memory before returning.
 
     Returns:
-        Tuple of (list of dictionaries containing kitty data, list of errors)
+        Tuple of (list of dictionaries containing kitty data, list of errors),
+        both in listing order
     """
     kitties_data = []
     errors = []
+    for item in iter_scrape_shelter(shelter, **options):
+        if item.error:
+            errors.append(item.error)
+        else:
+            kitties_data.append(item.kitty)
+    return kitties_data, errors
 
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
 
-            page.goto(shelter.scrape_url, wait_until="domcontentloaded")
+class ScrapeLoop:
+    """An event loop in a background thread that owns a BrowserPool, so
+    scrapes run one after another can share one browser.
+
+    Use it as a context manager, and pass it to iter_scrape_shelter as
+    scrape_loop. It runs one scrape at a time; give each thread that scrapes
+    in parallel a ScrapeLoop of its own. Leaving it closes the browser.
+    """
+
+    def __init__(self):
+        self.pool = BrowserPool()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="scrape-loop", daemon=True
+        )
+
+    def __enter__(self) -> "ScrapeLoop":
+        self._thread.start()
+        return self
 
+    def __exit__(self, *exc_info):
+        try:
+            self.submit(self.pool.close()).result()
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def submit(self, coroutine) -> concurrent.futures.Future:
+        """Run a coroutine on the loop, returning a future for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+
+def iter_scrape_shelter(
+    shelter,
+    concurrency: int = 1,
+    known_kitties: dict[str, dict[str, Any]] | None = None,
+    request_policy: RequestPolicy | None = None,
+    stats: ScrapeStats | None = None,
+    engine: str | None = None,
+    cache: ResponseCache | None = None,
+    archive: PageArchive | None = None,
+    skip_links: set[str] | None = None,
+    scrape_loop: ScrapeLoop | None = None,
+) -> Iterator[ScrapedItem]:
+    """Scrape the shelter website, yielding each kitty as it is extracted.
+
+    The scrape runs on the event loop of a ScrapeLoop, with its BrowserPool.
+    Only a few items are buffered ahead of the consumer, so memory stays flat
+    however long the listing is, and closing the iterator early stops the
+    scrape.
+
+    Args:
+        shelter: A Shelter model instance
+        concurrency: Number of kitty detail pages to fetch in parallel at
+            first. It is tuned while scraping, up to the shelter's maximum.
+        known_kitties: Previously scraped kitty data keyed by link. Listing
+            entries whose link, name and location match a known kitty are
+            carried forward without visiting their detail page.
+        request_policy: Which requests pages may make. Defaults to the policy
+            configured in settings.
+        stats: Optional ScrapeStats to collect per-page timing and traffic into
+        engine: "playwright" or "http". Defaults to the shelter's scrape_engine.
+        cache: Optional ResponseCache the HTTP engine uses for conditional
+            requests and to skip re-parsing unchanged pages
+        archive: Optional PageArchive to record every response to, or to
+            replay responses from instead of the network. The cache is not
+            used while recording or replaying.
+        skip_links: Links of listing entries that were already scraped, e.g.
+            by an interrupted run being resumed. They are not yielded.
+        scrape_loop: The ScrapeLoop to scrape on, to share its browser with
+            other scrapes. Defaults to a ScrapeLoop of this scrape's own.
+
+    Yields:
+        A ScrapedItem per listing entry not in skip_links, in listing order
+    """
+    items = queue.Queue(maxsize=max(1, concurrency) * 2)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
             try:
-                page.wait_for_selector(".adoption__item", timeout=5000)
-            except TimeoutError:
-                logger.warning(
-                    "Timeout waiting for kitty cards on %s", shelter.scrape_url
-                )
-                return [], []
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    async def produce(pool: BrowserPool):
+        try:
+            stream = scrape_shelter_stream(
+                shelter,
+                pool,
+                concurrency=concurrency,
+                known_kitties=known_kitties,
+                request_policy=request_policy,
+                stats=stats,
+                engine=engine,
+                cache=cache,
+                archive=archive,
+                skip_links=skip_links,
+            )
+            async with aclosing(stream):
+                async for item in stream:
+                    if not await asyncio.to_thread(put, item):
+                        return
+        except Exception as e:
+            logger.exception("Error scraping %s", shelter.scrape_url)
+            await asyncio.to_thread(put, ScrapedItem(None, None, None, error_record(e)))
+        finally:
+            await asyncio.to_thread(put, done)
 
-            kitty_cards = page.query_selector_all(".adoption__item")
-            card_links = []
+    with ExitStack() as stack:
+        if scrape_loop is None:
+            scrape_loop = stack.enter_context(ScrapeLoop())
+        future = scrape_loop.submit(produce(scrape_loop.pool))
+        try:
+            while (item := items.get()) is not done:
+                yield item
+        finally:
+            stopped.set()
+            future.result()
 
-            for card in kitty_cards:
-                name_element = card.query_selector(".adoption__item--name a")
-                name_text = name_element.inner_text().strip()
-                card_link = name_element.get_attribute("href")
-                location_element = card.query_selector("div:nth-child(3)")
 
-                if location_element:
-                    location_text = location_element.inner_text().strip()
+def _known_kitty(
+    card_info: dict[str, str], known_kitties: dict[str, dict[str, Any]]
+) -> dict[str, Any] | None:
+    """Return the stored data for a listing entry that has not changed."""
+    known = known_kitties.get(card_info["link"])
+    if (
+        known
+        and known.get("name") == card_info["name"]
+        and known.get("location") == card_info["location"]
+    ):
+        return known
+    return None
+
+
+class _BorrowedContext:
+    """A browser context borrowed from the pool and the pages opened in it"""
+
+    def __init__(self, context, exit_stack: AsyncExitStack):
+        self.context = context
+        self.exit_stack = exit_stack
+        self.idle_pages = []
+        self.pages_in_use = 0
+        self.page_loads = 0
+        self.retired = False
+
+    async def close_if_idle(self):
+        """Give a retired context back to the pool once no page is in use"""
+        if self.retired and not self.pages_in_use:
+            await self.exit_stack.aclose()
+
+
+class PlaywrightEngine:
+    """Fetches and extracts pages with Chromium.
+
+    The browser context is borrowed from the pool on first use, so an engine
+    that is only kept as a fallback costs nothing until it is needed. Up to
+    `concurrency` pages are opened and shared between fetches. After
+    SCRAPER_CONTEXT_MAX_PAGES page loads the context is given back and a
+    fresh one borrowed, so the pool can replace a worn-out browser partway
+    through a long scrape.
+
+    Args:
+        pool: The BrowserPool to borrow a context from
+        request_policy: Which requests pages may make
+        concurrency: Maximum number of pages open at once
+        stats: Optional ScrapeStats to record each page load into
+        archive: Optional PageArchive to record responses to or replay from
+    """
+
+    def __init__(
+        self,
+        pool: BrowserPool,
+        request_policy: RequestPolicy,
+        concurrency: int,
+        stats: ScrapeStats | None = None,
+        archive: PageArchive | None = None,
+    ):
+        self.pool = pool
+        self.request_policy = request_policy
+        self.concurrency = concurrency
+        self.stats = stats
+        self.archive = archive
+        self._borrowed: _BorrowedContext | None = None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "PlaywrightEngine":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._borrowed is not None:
+            self._borrowed.retired = True
+            await self._borrowed.close_if_idle()
+            self._borrowed = None
+
+    async def _borrow_context(self) -> _BorrowedContext:
+        with phase(self.stats, "browser_start"):
+            async with AsyncExitStack() as exit_stack:
+                context = await exit_stack.enter_async_context(self.pool.context())
+                if self.archive:
+                    await self.archive.install(context)
+                return _BorrowedContext(context, exit_stack.pop_all())
+
+    @asynccontextmanager
+    async def _page(self):
+        """Borrow an open page, opening a new one while under the limit"""
+        async with self._slots:
+            async with self._lock:
+                borrowed = self._borrowed
+                if (
+                    borrowed is not None
+                    and borrowed.page_loads >= settings.SCRAPER_CONTEXT_MAX_PAGES
+                ):
+                    borrowed.retired = True
+                    self._borrowed = None
+                    await borrowed.close_if_idle()
+                if self._borrowed is None:
+                    self._borrowed = await self._borrow_context()
+                borrowed = self._borrowed
+
+                if borrowed.idle_pages:
+                    page, meter = borrowed.idle_pages.pop()
                 else:
-                    location_text = "N/A"
+                    with phase(self.stats, "page_open"):
+                        page = await borrowed.context.new_page()
+                        meter = PageMeter(page)
+                        await self.request_policy.install(page, meter)
+                borrowed.pages_in_use += 1
+                borrowed.page_loads += 1
 
-                card_links.append(
-                    {"name": name_text, "link": card_link, "location": location_text}
-                )
+            meter.reset()
+            try:
+                yield page, meter
+            finally:
+                borrowed.pages_in_use -= 1
+                if borrowed.retired:
+                    await borrowed.close_if_idle()
+                else:
+                    borrowed.idle_pages.append((page, meter))
 
-            for card_info in tqdm.tqdm(card_links):
-                try:
-                    name_text = card_info["name"]
-                    card_link = card_info["link"]
+    async def _goto(self, page, url: str, kind: str):
+        with phase(self.stats, f"{kind}_navigate"):
+            response = await page.goto(
+                url,
+                wait_until="domcontentloaded",
+                timeout=settings.SCRAPER_PAGE_TIMEOUT,
+            )
+        # Fail on error pages straight away rather than waiting out the
+        # selector timeout on them.
+        if response is not None and is_throttling_status(response.status):
+            raise ThrottledError(
+                url, response.status, response.headers.get("retry-after")
+            )
+        if response is not None and response.status >= 400:
+            raise PageStatusError(url, response.status)
 
-                    page.goto(card_link, wait_until="domcontentloaded")
+    def _record_timeout(self):
+        if self.stats is not None:
+            self.stats.timeouts += 1
 
-                    try:
-                        page.wait_for_selector(
-                            ".elementor-widget-theme-post-content .elementor-widget-container",
-                            timeout=5000,
-                        )
-                    except TimeoutError:
-                        logger.warning(
-                            "Timeout waiting for card content on %s", card_link
+    async def fetch_listing(self, url: str) -> list[dict[str, str]]:
+        """Return the kitty cards on a listing page.
+
+        Raises:
+            PlaywrightTimeoutError: If no kitty cards appear in time. Like any
+                other failed fetch, it is retried and counted by the breaker.
+        """
+        async with self._page() as (page, meter):
+            try:
+                await self._goto(page, url, "listing")
+
+                with phase(self.stats, "listing_wait"):
+                    await page.wait_for_selector(
+                        LISTING_SELECTOR, timeout=settings.SCRAPER_SELECTOR_TIMEOUT
+                    )
+
+                with phase(self.stats, "listing_extract"):
+                    return await extract_listing(page)
+            finally:
+                meter.record(self.stats, url)
+
+    async def fetch_detail(self, url: str) -> dict[str, Any]:
+        """Return the fields extracted from a kitty detail page"""
+        async with self._page() as (page, meter):
+            try:
+                await self._goto(page, url, "detail")
+
+                try:
+                    with phase(self.stats, "detail_wait"):
+                        await page.wait_for_selector(
+                            DESCRIPTION_SELECTOR,
+                            timeout=settings.SCRAPER_SELECTOR_TIMEOUT,
                         )
+                except PlaywrightTimeoutError:
+                    logger.warning("Timeout waiting for card content on %s", url)
+                    self._record_timeout()
+
+                with phase(self.stats, "detail_extract"):
+                    return await extract_detail(page)
+            finally:
+                meter.record(self.stats, url)
+
+
+async def scrape_shelter_stream(
+    shelter,
+    pool: BrowserPool,
+    concurrency: int = 1,
+    known_kitties: dict[str, dict[str, Any]] | None = None,
+    request_policy: RequestPolicy | None = None,
+    stats: ScrapeStats | None = None,
+    engine: str | None = None,
+    cache: ResponseCache | None = None,
+    archive: PageArchive | None = None,
+    skip_links: set[str] | None = None,
+) -> AsyncIterator[ScrapedItem]:
+    """Scrape the shelter website with a browser borrowed from a pool.
+
+    Takes the same arguments as iter_scrape_shelter, plus the BrowserPool to
+    borrow the browser context from, so long-running callers can reuse one
+    browser across many scrapes. The HTTP engine only uses the pool for pages
+    it has to fall back on the browser for.
+
+    Requests are rate limited per host and concurrency is tuned between 1 and
+    the maximum, using the limits set on the shelter or else in settings.
+    Transient failures are retried with backoff, and after too many in a row
+    the rest of the shelter is given up on, ending with a circuit_open error.
+
+    Yields:
+        A ScrapedItem per listing entry not in skip_links, in listing order.
+        If the scrape fails as a whole, a final item with only an error is
+        yielded.
+    """
+    max_concurrency = _shelter_setting(
+        shelter.scrape_max_concurrency, settings.SCRAPER_MAX_CONCURRENCY
+    )
+    controller = ConcurrencyController(
+        shelter.name,
+        initial=concurrency,
+        maximum=max_concurrency,
+        target_latency=_shelter_setting(
+            shelter.scrape_target_latency, settings.SCRAPER_TARGET_LATENCY
+        ),
+        stats=stats,
+    )
+    guard = _FetchGuard(
+        controller,
+        HostRateLimiter(
+            _shelter_setting(
+                shelter.scrape_requests_per_second,
+                settings.SCRAPER_REQUESTS_PER_SECOND,
+            )
+        ),
+        RetryPolicy.from_settings(),
+        CircuitBreaker(shelter.name, settings.SCRAPER_CIRCUIT_BREAKER_THRESHOLD),
+        stats,
+    )
+    known_kitties = known_kitties or {}
+    skip_links = skip_links or set()
+    request_policy = request_policy or RequestPolicy.from_settings()
+    engine = engine or shelter.scrape_engine
+    if archive:
+        cache = None
+    pending = deque()
+
+    try:
+        async with AsyncExitStack() as stack:
+            fetcher = await stack.enter_async_context(
+                PlaywrightEngine(
+                    pool, request_policy, controller.maximum, stats, archive
+                )
+            )
+            if engine == "http":
+                fetcher = await stack.enter_async_context(
+                    HttpEngine(fetcher, controller.maximum, stats, cache, archive)
+                )
+
+            card_links = await guard.fetch(
+                fetcher.fetch_listing, shelter.scrape_url, "listing"
+            )
+            if not card_links:
+                # An empty listing is far more likely a broken page than a
+                # shelter with no kitties, and must not complete the run.
+                raise ExtractionError("No kitty cards on the listing")
 
-                    description_element = page.query_selector(
-                        ".elementor-widget-theme-post-content .elementor-widget-container"
+            skipped_count = sum(
+                card_info["link"] in skip_links for card_info in card_links
+            )
+            stale_count = sum(
+                card_info["link"] not in skip_links
+                and not _known_kitty(card_info, known_kitties)
+                for card_info in card_links
+            )
+            logger.info(
+                "Found %d kitties on %s, %d already scraped, %d new or changed",
+                len(card_links),
+                shelter.scrape_url,
+                skipped_count,
+                stale_count,
+            )
+
+            # At most `controller.limit` detail pages are fetched at once, from
+            # a window of upcoming listing entries that is drained in order, so
+            # items are yielded in listing order without holding the whole
+            # listing's results.
+            progress = tqdm(total=len(card_links), initial=skipped_count)
+            for position, card_info in enumerate(card_links):
+                if guard.breaker.is_open:
+                    break
+                if card_info["link"] in skip_links:
+                    continue
+
+                known = _known_kitty(card_info, known_kitties)
+                if known:
+                    future = asyncio.get_running_loop().create_future()
+                    future.set_result(
+                        ScrapedItem(position, card_info["link"], known, None)
                     )
-                    card_text = (
-                        description_element.inner_html()
-                        if description_element
-                        else "Unknown"
+                else:
+                    future = asyncio.ensure_future(
+                        _scrape_kitty(
+                            fetcher, guard, shelter.scrape_url, position, card_info
+                        )
                     )
+                pending.append(future)
 
-                    facts_element = page.query_selector(
-                        ".elementor-widget-adoption-facts .elementor-widget-container"
-                    )
+                while len(pending) > controller.limit * 2 or (
+                    pending and pending[0].done()
+                ):
+                    progress.update()
+                    item = await pending.popleft()
+                    if not _skipped_by_breaker(item):
+                        yield item
 
-                    age_text = (
-                        facts_element.query_selector_all("p")[0]
-                        .inner_text()
-                        .strip()
-                        .split("Age:")[-1]
-                    )
+            while pending:
+                progress.update()
+                item = await pending.popleft()
+                if not _skipped_by_breaker(item):
+                    yield item
+            progress.close()
 
-                    weight_text = (
-                        facts_element.query_selector_all("p")[1]
-                        .inner_text()
-                        .strip()
-                        .split("Weight:")[-1]
-                    )
+            guard.breaker.check()
 
-                    gender_text = (
-                        facts_element.query_selector_all("p")[2]
-                        .inner_text()
-                        .strip()
-                        .split("Gender:")[-1]
-                    )
+    except Exception as e:
+        logger.error(
+            "Error scraping %s: %s", shelter.scrape_url, error_code(e), exc_info=True
+        )
+        yield ScrapedItem(None, None, None, error_record(e))
 
-                    breed_text = (
-                        facts_element.query_selector_all("p")[3]
-                        .inner_text()
-                        .strip()
-                        .split("Breed:")[-1]
-                    )
+    finally:
+        for future in pending:
+            future.cancel()
 
-                    image_urls = [
-                        img.get_attribute("src")
-                        for img in page.query_selector_all(".swiper-slide-image")
-                    ]
-
-                    kitty_data = {
-                        "link": card_link,
-                        "name": name_text,
-                        "age": age_text,
-                        "weight": weight_text,
-                        "gender": gender_text,
-                        "breed": breed_text,
-                        "color": "TODO",  # TODO: Extract color from image
-                        "description": card_text,
-                        "image_urls": image_urls,
-                        "location": location_text,
-                    }
-                    kitties_data.append(kitty_data)
-
-                except Exception as e:
-                    error_msg = f"{str(e)}\n{traceback.format_exc()}"
-                    logger.error("Error extracting kitty data: %s", error_msg)
-                    errors.append(error_msg)
-                    continue
 
-            browser.close()
+def _skipped_by_breaker(item: ScrapedItem) -> bool:
+    """Kitties the tripped circuit breaker skipped are left for a resume"""
+    return item.error is not None and item.error["code"] == "circuit_open"
+
+
+def _shelter_setting(value, default):
+    """Return a shelter's own scrape setting, or the default if it is unset"""
+    return default if value is None else value
+
+
+class _FetchGuard:
+    """Runs a scrape's fetches under its rate limit, concurrency limit, retry
+    policy and circuit breaker"""
+
+    def __init__(
+        self,
+        controller: ConcurrencyController,
+        limiter: HostRateLimiter,
+        retry_policy: RetryPolicy,
+        breaker: CircuitBreaker,
+        stats: ScrapeStats | None = None,
+    ):
+        self.controller = controller
+        self.limiter = limiter
+        self.retry_policy = retry_policy
+        self.breaker = breaker
+        self.stats = stats
+
+    async def fetch(self, fetch, url: str, kind: str):
+        """Return fetch(url), retrying transient failures.
 
+        The whole fetch, retries included, is timed as the `kind` phase.
+
+        Raises:
+            CircuitOpenError: If the breaker has tripped, before or while
+                retrying
+        """
+        with phase(self.stats, kind):
+            return await self._fetch_with_retries(fetch, url)
+
+    async def _fetch_with_retries(self, fetch, url: str):
+        attempt = 0
+        while True:
+            self.breaker.check()
+            attempt += 1
+            try:
+                # The wait for the rate limiter counts towards the fetch's
+                # latency, so a rate limited scrape stops raising its
+                # concurrency.
+                async with self.controller.slot():
+                    with phase(self.stats, "rate_limit_wait"):
+                        await self.limiter.acquire(url)
+                    result = await fetch(url)
+            except Exception as e:
+                self.breaker.record_failure(e)
+                if self.stats is not None and error_code(e) == "timeout":
+                    self.stats.timeouts += 1
+                if not self.retry_policy.should_retry(e, attempt):
+                    raise
+                if self.stats is not None:
+                    self.stats.retries += 1
+                delay = self.retry_policy.delay(e, attempt)
+                logger.info(
+                    "Retrying %s in %.2fs after %s (attempt %d of %d)",
+                    url,
+                    delay,
+                    error_code(e),
+                    attempt,
+                    self.retry_policy.attempts,
+                )
+                with phase(self.stats, "backoff"):
+                    await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+
+async def _scrape_kitty(
+    fetcher,
+    guard: _FetchGuard,
+    listing_url: str,
+    position: int,
+    card_info: dict[str, str],
+) -> ScrapedItem:
+    """Scrape a kitty's detail page.
+
+    Args:
+        fetcher: The engine to fetch the detail page with
+        guard: Runs the fetch with the scrape's limits and retries
+        listing_url: The listing page, to resolve relative links against
+        position: The kitty's position on the listing
+        card_info: The name, link and location read from the listing card
+    """
+    card_link = card_info["link"]
+
+    try:
+        kitty_data = await guard.fetch(
+            fetcher.fetch_detail, urljoin(listing_url, card_link), "detail"
+        )
     except Exception as e:
-        error_msg = f"{str(e)}\n{traceback.format_exc()}"
-        errors = [error_msg]
-        logger.error("Error scraping shelter: %s", error_msg)
-        return [], errors
+        logger.warning("Error scraping %s: %s", card_link, error_code(e), exc_info=True)
+        return ScrapedItem(position, card_link, None, error_record(e, card_link))
 
-    return kitties_data, errors
+    return ScrapedItem(
+        position,
+        card_link,
+        {
+            "link": card_link,
+            "name": card_info["name"],
+            "age": kitty_data["age"],
+            "weight": kitty_data["weight"],
+            "gender": kitty_data["gender"],
+            "breed": kitty_data["breed"],
+            "color": "TODO",  # TODO: Extract color from image
+            "description": kitty_data["description"],
+            "image_urls": kitty_data["image_urls"],
+            "location": card_info["location"],
+        },
+        None,
+    )
@@ -156,3 +156,103 @@ EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True").lower() in ("true", "1", "yes
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "noreply@kittyalert.com")
+# Seconds to wait on the mail server before giving up on an SMTP connection or
+# command. Keep it well below NOTIFICATION_CLAIM_TIMEOUT, so a hung server
+# fails the batch before another worker reclaims and resends it.
+EMAIL_TIMEOUT = float(os.getenv("EMAIL_TIMEOUT", "30"))
+
+# Where the site is served, for building absolute links in emails
+SITE_URL = os.getenv("SITE_URL", "http://localhost:8000").rstrip("/")
+
+# Number of emails sent over one SMTP connection before it is closed and a new
+# one opened. Many mail servers limit the messages allowed per connection.
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "100"))
+
+# Number of shelters send_notifications notifies subscribers of at once
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", "4"))
+
+# deliver_notifications sends queued notifications from
+# NOTIFICATION_DELIVERY_WORKERS threads. All deliver_notifications processes
+# together send at most NOTIFICATION_RATE_LIMIT emails per second (0 for no
+# limit), coordinated through the database. A failed email is retried up to
+# NOTIFICATION_MAX_ATTEMPTS times in all, with jittered exponential backoff in
+# seconds. A worker's claim on a batch expires after NOTIFICATION_CLAIM_TIMEOUT
+# seconds, so another worker picks it up if the first one died.
+NOTIFICATION_DELIVERY_WORKERS = int(os.getenv("NOTIFICATION_DELIVERY_WORKERS", "4"))
+NOTIFICATION_RATE_LIMIT = float(os.getenv("NOTIFICATION_RATE_LIMIT", "10"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+NOTIFICATION_RETRY_BASE_DELAY = float(os.getenv("NOTIFICATION_RETRY_BASE_DELAY", "60"))
+NOTIFICATION_RETRY_MAX_DELAY = float(os.getenv("NOTIFICATION_RETRY_MAX_DELAY", "3600"))
+NOTIFICATION_CLAIM_TIMEOUT = int(os.getenv("NOTIFICATION_CLAIM_TIMEOUT", "600"))
+
+# Scraper settings
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "4"))
+SCRAPER_MAX_BROWSERS = int(os.getenv("SCRAPER_MAX_BROWSERS", "2"))
+SCRAPER_FULL_REFRESH_DAYS = int(os.getenv("SCRAPER_FULL_REFRESH_DAYS", "7"))
+
+# Requests the scraper aborts before they are downloaded. Lists are comma
+# separated; an empty SCRAPER_ALLOWED_DOMAINS allows every domain.
+SCRAPER_BLOCKED_RESOURCE_TYPES = [
+    resource_type
+    for resource_type in os.getenv(
+        "SCRAPER_BLOCKED_RESOURCE_TYPES", "image,media,font"
+    ).split(",")
+    if resource_type
+]
+SCRAPER_BLOCKED_DOMAINS = [
+    domain
+    for domain in os.getenv(
+        "SCRAPER_BLOCKED_DOMAINS",
+        "google-analytics.com,googletagmanager.com,doubleclick.net,"
+        "googlesyndication.com,facebook.net,facebook.com,hotjar.com,"
+        "clarity.ms,bing.com,tiktok.com,pinterest.com",
+    ).split(",")
+    if domain
+]
+SCRAPER_ALLOWED_DOMAINS = [
+    domain for domain in os.getenv("SCRAPER_ALLOWED_DOMAINS", "").split(",") if domain
+]
+
+# A pooled browser is replaced after this many page loads or once its
+# processes use more than this much resident memory.
+SCRAPER_BROWSER_MAX_PAGES = int(os.getenv("SCRAPER_BROWSER_MAX_PAGES", "500"))
+SCRAPER_BROWSER_MAX_MEMORY_MB = int(os.getenv("SCRAPER_BROWSER_MAX_MEMORY_MB", "1536"))
+# A scrape gives its browser context back to the pool and borrows a fresh one
+# after this many page loads, so a worn-out browser is replaced partway through
+# a long listing rather than only between scrapes.
+SCRAPER_CONTEXT_MAX_PAGES = int(os.getenv("SCRAPER_CONTEXT_MAX_PAGES", "100"))
+
+# On-disk cache of shelter pages for the HTTP scrape engine. Set
+# SCRAPER_CACHE_DIR to an empty string to disable it.
+SCRAPER_CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", str(BASE_DIR / ".scrape_cache"))
+SCRAPER_CACHE_MAX_BYTES = int(
+    os.getenv("SCRAPER_CACHE_MAX_BYTES", str(256 * 1024 * 1024))
+)
+
+# Number of scraped kitties inserted per batch while a scrape runs
+SCRAPER_WRITE_BATCH_SIZE = int(os.getenv("SCRAPER_WRITE_BATCH_SIZE", "25"))
+
+# Defaults for how hard the scraper may hit a shelter's site; each Shelter can
+# override them. Concurrency starts at SCRAPER_CONCURRENCY and is tuned between
+# 1 and SCRAPER_MAX_CONCURRENCY based on page load times and errors.
+SCRAPER_REQUESTS_PER_SECOND = float(os.getenv("SCRAPER_REQUESTS_PER_SECOND", "5"))
+SCRAPER_MAX_CONCURRENCY = int(os.getenv("SCRAPER_MAX_CONCURRENCY", "16"))
+SCRAPER_TARGET_LATENCY = float(os.getenv("SCRAPER_TARGET_LATENCY", "3"))
+
+# Transient scrape failures (timeouts, dropped connections, 429 and 5xx) are
+# retried with jittered exponential backoff. After
+# SCRAPER_CIRCUIT_BREAKER_THRESHOLD of them in a row the shelter is given up
+# on until the run is resumed. Timeouts are in milliseconds.
+SCRAPER_RETRY_ATTEMPTS = int(os.getenv("SCRAPER_RETRY_ATTEMPTS", "3"))
+SCRAPER_RETRY_BASE_DELAY = float(os.getenv("SCRAPER_RETRY_BASE_DELAY", "0.5"))
+SCRAPER_RETRY_MAX_DELAY = float(os.getenv("SCRAPER_RETRY_MAX_DELAY", "8"))
+SCRAPER_CIRCUIT_BREAKER_THRESHOLD = int(
+    os.getenv("SCRAPER_CIRCUIT_BREAKER_THRESHOLD", "5")
+)
+SCRAPER_PAGE_TIMEOUT = int(os.getenv("SCRAPER_PAGE_TIMEOUT", "15000"))
+SCRAPER_SELECTOR_TIMEOUT = int(os.getenv("SCRAPER_SELECTOR_TIMEOUT", "5000"))
+
+# compact_scrape_runs keeps the full raw data and scraped kitties of each
+# shelter's SCRAPE_RUNS_KEPT most recent runs, and of any run a notification
+# was sent for. Older runs are thinned to their counts and an error summary.
+SCRAPE_RUNS_KEPT = int(os.getenv("SCRAPE_RUNS_KEPT", "7"))
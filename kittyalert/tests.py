@@ -0,0 +1,101 @@
+"""Tests for the 😻 Kitty Alert app"""
+
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from kittyalert.management.commands.send_notifications import Command
+from kittyalert.models import (
+    Adopter,
+    Kitty,
+    Notification,
+    ScrapedKitty,
+    ScrapeRun,
+    Shelter,
+    Subscription,
+)
+
+User = get_user_model()
+
+
+class SendNotificationsQueryCountTest(TestCase):
+    """Queuing a shelter's notifications takes the same number of queries
+    however many subscribers it has"""
+
+    def setUp(self):
+        cache.clear()
+
+    def create_shelter(self, name: str, subscription_count: int) -> Shelter:
+        """Create a shelter whose latest completed run found one new kitty,
+        with subscribers never notified before"""
+        shelter = Shelter.objects.create(
+            name=name, scrape_url=f"https://example.com/{name}/"
+        )
+        kitties = [
+            Kitty.objects.create(
+                shelter=shelter,
+                identity=Kitty.identity_for(link, ""),
+                link=link,
+                name=kitty_name,
+                age="1",
+                weight="8",
+                gender="Female",
+                breed="Domestic Shorthair",
+                color="Tabby",
+                description="",
+                location="Adoption center",
+            )
+            for kitty_name, link in [
+                ("Mittens", f"https://example.com/{name}/mittens/"),
+                ("Biscuit", f"https://example.com/{name}/biscuit/"),
+            ]
+        ]
+        previous_scrape_run = ScrapeRun.objects.create(
+            shelter=shelter, status="completed"
+        )
+        latest_scrape_run = ScrapeRun.objects.create(
+            shelter=shelter, status="completed"
+        )
+        for scrape_run, run_kitties in [
+            (previous_scrape_run, kitties[:1]),
+            (latest_scrape_run, kitties),
+        ]:
+            ScrapedKitty.objects.bulk_create(
+                ScrapedKitty(
+                    scrape_run=scrape_run,
+                    kitty=kitty,
+                    position=position,
+                    link=kitty.link,
+                )
+                for position, kitty in enumerate(run_kitties)
+            )
+
+        for index in range(subscription_count):
+            user = User.objects.create(
+                username=f"{name}-adopter{index}",
+                email=f"{name}-adopter{index}@example.com",
+            )
+            adopter = Adopter.objects.create(user=user, email=user.email)
+            Subscription.objects.create(adopter=adopter, shelter=shelter)
+        return shelter
+
+    def test_notify_query_count_does_not_grow_with_subscriptions(self):
+        one_subscription_shelter = self.create_shelter("one", 1)
+        many_subscriptions_shelter = self.create_shelter("many", 10)
+        command = Command(stdout=StringIO())
+
+        with CaptureQueriesContext(connection) as one_subscription_queries:
+            self.assertEqual(command.notify(one_subscription_shelter), (1, 1))
+        with self.assertNumQueries(len(one_subscription_queries)):
+            self.assertEqual(command.notify(many_subscriptions_shelter), (10, 1))
+
+        self.assertEqual(
+            Notification.objects.filter(
+                subscription__shelter=many_subscriptions_shelter, status="pending"
+            ).count(),
+            10,
+        )
@@ -6,7 +6,7 @@ from django.core.cache import cache
 from django.db.models import Exists, OuterRef
 from django.shortcuts import redirect, render
 
-from .models import Adopter, Kitty, ScrapeRun, Shelter, Subscription
+from .models import Adopter, Kitty, Shelter, Subscription
 
 
 def home(request):
@@ -47,28 +47,33 @@ def adopter_dashboard(request, adopter_id):
 
 @login_required
 def shelter_kitty_list(request, shelter_id):
-    """View to display the list of kitties
+    """View to display the kitties found by the shelter's latest scrape
 
-    Cached for 24 hours to avoid repeated scrapes.
+    Cached until the shelter is scraped again.
     """
     adopter = Adopter.objects.get(user=request.user)
     adopter_kitties = adopter.kitties.all()
-    latest_scrape_run = ScrapeRun.objects.order_by("-created").first()
+    shelter = Shelter.objects.get(id=shelter_id)
+    latest_scrape_run = shelter.latest_completed_scrape_run()
 
-    cache_key = (
-        f"kitty_list_{latest_scrape_run.created.timestamp()}"
-        if latest_scrape_run
-        else None
-    )
-    cache_hit = cache.get(cache_key)
+    cache_key = f"kitty_list_{latest_scrape_run.id}" if latest_scrape_run else None
+    cache_hit = cache.get(cache_key) if cache_key else None
 
     if cache_hit:
         kitties = cache_hit["kitties"]
         errors = cache_hit["errors"]
-    else:
-        kitties = latest_scrape_run.raw_data
+    elif latest_scrape_run:
+        kitties = [
+            scraped_kitty.kitty
+            for scraped_kitty in latest_scrape_run.scraped_kitties.select_related(
+                "kitty"
+            ).order_by("position")
+        ]
         errors = latest_scrape_run.errors
         cache.set(cache_key, {"kitties": kitties, "errors": errors})
+    else:
+        kitties = []
+        errors = []
 
     # No need to create image_urls_json anymore since we're using multiple inputs
 
@@ -80,7 +85,7 @@ def shelter_kitty_list(request, shelter_id):
             "adopter": adopter,
             "adopter_kitties": adopter_kitties,
             "errors": errors,
-            "shelter": Shelter.objects.get(id=shelter_id),
+            "shelter": shelter,
         },
     )
 
@@ -92,8 +97,9 @@ def kitty_save(request, adopter_id):
 
     kitty, created = Kitty.objects.get_or_create(
         shelter=Shelter.objects.get(slug="sf-spca"),
-        description=request.POST["description"],
+        identity=Kitty.identity_for(request.POST["link"], request.POST["description"]),
         defaults={
+            "description": request.POST["description"],
             "name": request.POST["name"],
             "image_urls": request.POST.getlist("image_urls"),
             "weight": request.POST["weight"],